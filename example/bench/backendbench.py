@@ -0,0 +1,57 @@
+# -----------------------------------------------------------------------------
+# backendbench.py
+#
+# Times a lexer with each regular expression engine that is installed.
+# Engines that are not installed are skipped.
+#
+# usage: python backendbench.py lexer.py input [repeat]
+# -----------------------------------------------------------------------------
+
+import importlib
+import importlib.util
+import os
+import sys
+import time
+
+import ply.lex as lex
+
+ENGINES = ['re', 'regex', 're2']
+
+def load_module(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = sys.modules[name] = importlib.util.module_from_spec(spec)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(path)))
+    spec.loader.exec_module(module)
+    return module
+
+def main():
+    if len(sys.argv) < 3:
+        print('usage: python backendbench.py lexer.py input [repeat]')
+        raise SystemExit(1)
+    module = load_module(sys.argv[1])
+    with open(sys.argv[2]) as f:
+        data = f.read()
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    for engine in ENGINES:
+        try:
+            importlib.import_module(engine)
+        except ImportError:
+            print('%-8s not installed' % engine)
+            continue
+        start = time.perf_counter()
+        lexer = lex.lex(module=module, backend=engine)
+        build = time.perf_counter() - start
+        best = None
+        for _ in range(repeat):
+            lexer.input(data)
+            lexer.lineno = 1
+            start = time.perf_counter()
+            ntokens = sum(1 for _ in lexer)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print('%-8s build %7.1f ms   lex %7.1f ms   %d tokens' % (engine, build * 1000, best * 1000, ntokens))
+
+if __name__ == '__main__':
+    main()
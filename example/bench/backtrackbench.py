@@ -0,0 +1,98 @@
+# -----------------------------------------------------------------------------
+# backtrackbench.py
+#
+# Fuzzes every rule of a lexer with inputs built from the characters the rule
+# mentions and reports the slowest match found at each input length.  Times
+# that grow much faster than the input point at rules that make re backtrack.
+# Run lex() with check_backtracking=True to find such rules statically.
+#
+# usage: python backtrackbench.py [lexer.py]
+#
+# Without an argument a small built-in lexer with one bad rule is used.
+# -----------------------------------------------------------------------------
+
+import importlib.util
+import os
+import random
+import re
+import sys
+import time
+
+import ply.lex as lex
+
+# Built-in example.  t_WORDS is the classic (\w+\s?)+ pattern.
+demo = {
+    'tokens': ['WORDS', 'NUMBER', 'STRING'],
+    't_NUMBER': r'\d+(\.\d+)?',
+    't_STRING': r'"([^"\\]|\\.)*"',
+    't_WORDS': r'(\w+\s?)+;',
+    't_error': lambda t: t.lexer.skip(1),
+}
+
+SIZES = (8, 12, 16, 20, 24, 28)
+TRIALS = 200
+LIMIT = 0.5             # Stop growing the input once one match takes this long
+
+def load_rules(path):
+    if path is None:
+        ldict = demo
+    else:
+        name = os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = sys.modules[name] = importlib.util.module_from_spec(spec)
+        sys.path.insert(0, os.path.dirname(os.path.abspath(path)))
+        spec.loader.exec_module(module)
+        ldict = vars(module)
+    linfo = lex.LexerReflect(ldict, reflags=int(re.VERBOSE))
+    linfo.get_all()
+    rules = []
+    for state in linfo.stateinfo:
+        for name, f in linfo.funcsym[state]:
+            rules.append((state, name, getattr(f, 'regex', f.__doc__)))
+        for name, r in linfo.strsym[state]:
+            rules.append((state, name, r))
+    return rules, linfo.reflags
+
+# Characters worth trying: the ones a rule spells out, plus one of each kind
+def alphabet(regex):
+    chars = set(re.sub(r'\\(.)', r'\1', regex)) - set('()[]{}|*+?^$')
+    chars.update('a0 _."\\;\n')
+    return sorted(chars)
+
+def worst_match(cre, chars, size, rnd):
+    worst = 0.0
+    for trial in range(TRIALS):
+        if trial < len(chars):
+            data = chars[trial] * size         # Long runs of one character
+        else:
+            data = ''.join(rnd.choice(chars) for _ in range(size))
+        data += '\x00'                         # Force the overall match to fail late
+        start = time.perf_counter()
+        cre.match(data)
+        elapsed = time.perf_counter() - start
+        worst = max(worst, elapsed)
+        if worst > LIMIT:
+            break
+    return worst
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    rules, reflags = load_rules(path)
+    rnd = random.Random(42)
+    print('%-24s %s' % ('rule', ' '.join('%9d' % n for n in SIZES)))
+    for state, name, regex in rules:
+        cre = re.compile(regex, reflags)
+        chars = alphabet(regex)
+        times = []
+        for size in SIZES:
+            t = worst_match(cre, chars, size, rnd)
+            times.append(t)
+            if t > LIMIT:
+                break
+        label = name if state == 'INITIAL' else '%s (%s)' % (name, state)
+        row = ' '.join('%8.3fms' % (t * 1000) for t in times)
+        flag = '  <-- grows too fast' if times[-1] > 50 * max(times[0], 1e-5) else ''
+        print('%-24s %s%s' % (label, row, flag))
+
+if __name__ == '__main__':
+    main()
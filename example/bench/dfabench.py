@@ -0,0 +1,76 @@
+# -----------------------------------------------------------------------------
+# dfabench.py
+#
+# Compares the re and DFA lexer engines on a keyword and operator heavy
+# input as the number of string rules grows.  Each keyword is its own
+# string rule, which is the worst case for a master regex that tries the
+# alternatives in order.
+#
+# usage: python dfabench.py [repeat]
+# -----------------------------------------------------------------------------
+
+import random
+import sys
+import time
+
+import ply.lex as lex
+
+operators = ['+', '-', '*', '/', '==', '!=', '<=', '>=', '<<', '>>', '&&', '||', '->', '(', ')', ';']
+
+def make_rules(nkeywords):
+    keywords = ['kw%d' % n for n in range(nkeywords)]
+    rules = {}
+    for n, kw in enumerate(keywords):
+        rules['t_KW%d' % n] = kw
+    for n, op in enumerate(operators):
+        rules['t_OP%d' % n] = '\\' + '\\'.join(op)
+    rules['t_NAME'] = r'_[A-Za-z0-9_]*'
+    rules['t_NUMBER'] = r'\d+'
+    rules['tokens'] = [name[2:] for name in rules if name.startswith('t_')]
+    rules['t_ignore'] = ' \n'
+
+    def t_error(t):
+        t.lexer.skip(1)
+
+    rules['t_error'] = t_error
+    return rules, keywords
+
+def make_input(keywords, ntokens):
+    rnd = random.Random(1234)
+    words = []
+    for _ in range(ntokens):
+        r = rnd.random()
+        if r < 0.5:
+            words.append(rnd.choice(keywords))
+        elif r < 0.8:
+            words.append(rnd.choice(operators))
+        elif r < 0.9:
+            words.append('_name%d' % rnd.randrange(100))
+        else:
+            words.append(str(rnd.randrange(1000)))
+    return ' '.join(words)
+
+def time_lexer(lexer, data, repeat):
+    best = None
+    for _ in range(repeat):
+        lexer.input(data)
+        start = time.perf_counter()
+        ntokens = sum(1 for _ in lexer)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return ntokens, best
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print('%8s %8s %10s %10s' % ('keywords', 'tokens', 're (ms)', 'dfa (ms)'))
+    for nkeywords in (10, 50, 200, 400):
+        rules, keywords = make_rules(nkeywords)
+        data = make_input(keywords, 20000)
+        relexer = lex.lex(module=rules)
+        dfalexer = lex.lex(module=rules, dfa=True)
+        ntokens, retime = time_lexer(relexer, data, repeat)
+        _, dfatime = time_lexer(dfalexer, data, repeat)
+        print('%8d %8d %10.1f %10.1f' % (nkeywords, ntokens, retime * 1000, dfatime * 1000))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# -----------------------------------------------------------------------------
+# parallelbench.py
+#
+# Compares reading a lexer token by token with lex_parallel() on a large
+# generated input with multi-line comments and strings.  Chunk boundaries
+# that land inside a comment or string are re-lexed serially, so the
+# parallel time includes those repairs.
+#
+# usage: python parallelbench.py [megabytes] [workers]
+# -----------------------------------------------------------------------------
+
+import os
+import random
+import sys
+import time
+
+import ply.lex as lex
+
+tokens = ('NAME', 'NUMBER', 'STRING', 'OP')
+
+states = (('comment', 'exclusive'),)
+
+t_ignore = ' \t'
+t_NAME = r'[A-Za-z_][A-Za-z0-9_]*'
+t_NUMBER = r'\d+'
+t_STRING = r'"[^"]*"'
+t_OP = r'[-+*/=<>;(){}]'
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_comment(t):
+    r'/\*'
+    t.lexer.begin('comment')
+
+def t_comment_end(t):
+    r'\*/'
+    t.lexer.begin('INITIAL')
+
+def t_comment_body(t):
+    r'[^*\n]+|\*'
+
+def t_comment_newline(t):
+    r'\n'
+    t.lexer.lineno += 1
+
+t_comment_ignore = ''
+
+def t_ANY_error(t):
+    t.lexer.skip(1)
+
+def make_input(size):
+    rnd = random.Random(1234)
+    lines = []
+    total = 0
+    while total < size:
+        r = rnd.random()
+        if r < 0.05:
+            line = '/* comment\n   spanning\n   lines */'
+        elif r < 0.1:
+            line = 'x = "string\nwith a newline";'
+        else:
+            line = 'if (a%d < %d) { b = c + %d; }' % (rnd.randrange(100), rnd.randrange(1000), rnd.randrange(10))
+        lines.append(line)
+        total += len(line) + 1
+    return '\n'.join(lines) + '\n'
+
+def main():
+    size = float(sys.argv[1]) if len(sys.argv) > 1 else 20
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    data = make_input(int(size * 1e6))
+    lexer = lex.lex()
+
+    start = time.perf_counter()
+    lexer.input(data)
+    serial = list(lexer)
+    serialtime = time.perf_counter() - start
+
+    lexer.lineno = 1
+    start = time.perf_counter()
+    parallel = lex.lex_parallel(lexer, data, workers=workers)
+    paralleltime = time.perf_counter() - start
+
+    same = [(t.type, t.value, t.lineno, t.lexpos) for t in serial] == \
+           [(t.type, t.value, t.lineno, t.lexpos) for t in parallel]
+    print(f'{len(serial)} tokens, {len(data)} characters, {workers} workers')
+    print(f'serial:   {serialtime * 1000:.0f} ms')
+    print(f'parallel: {paralleltime * 1000:.0f} ms (same tokens: {same})')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# -----------------------------------------------------------------------------
+# statebench.py
+#
+# Lexer benchmark dominated by state changes.  Strings with interpolated
+# expressions ("text ${a + 1} text") and nested comments switch the lexer
+# state every few characters, so the cost of begin(), push_state() and
+# pop_state() shows up directly in the time per token.
+#
+# usage: python statebench.py [repeat]
+# -----------------------------------------------------------------------------
+
+import sys
+import time
+
+import ply.lex as lex
+
+tokens = ('NAME', 'NUMBER', 'PLUS', 'STRSTART', 'STREND', 'TEXT',
+          'INTERP', 'RBRACE')
+
+states = (
+    ('string', 'exclusive'),
+    ('interp', 'inclusive'),
+    ('comment', 'exclusive'),
+)
+
+t_ignore = ' \t\n'
+t_NAME = r'[a-z]+'
+t_NUMBER = r'\d+'
+t_PLUS = r'\+'
+
+def t_STRSTART(t):
+    r'"'
+    t.lexer.push_state('string')
+    return t
+
+def t_string_STREND(t):
+    r'"'
+    t.lexer.pop_state()
+    return t
+
+def t_string_INTERP(t):
+    r'\$\{'
+    t.lexer.push_state('interp')
+    return t
+
+t_string_TEXT = r'[^"$]+'
+t_string_ignore = ''
+
+def t_interp_RBRACE(t):
+    r'\}'
+    t.lexer.pop_state()
+    return t
+
+def t_comment(t):
+    r'/\*'
+    t.lexer.push_state('comment')
+
+def t_comment_nested(t):
+    r'/\*'
+    t.lexer.push_state('comment')
+
+def t_comment_end(t):
+    r'\*/'
+    t.lexer.pop_state()
+
+def t_comment_body(t):
+    r'[^*/]+|[*/]'
+
+t_comment_ignore = ''
+
+def t_ANY_error(t):
+    t.lexer.skip(1)
+
+line = 'x + "a ${b + "c ${d} e"} f" /* g /* h */ i */ + "${j}${k}" + 1\n'
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    lexer = lex.lex()
+    data = line * 2000
+    best = None
+    for _ in range(repeat):
+        lexer.input(data)
+        start = time.perf_counter()
+        ntokens = sum(1 for _ in lexer)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'{ntokens} tokens, {len(data)} characters')
+    print(f'best of {repeat}: {best * 1000:.1f} ms ({ntokens / best:.0f} tokens/sec)')
+
+if __name__ == '__main__':
+    main()
@@ -37,8 +37,13 @@ import re
 import sys
 import types
 import copy
+import collections.abc
+import importlib
 import os
 import inspect
+import threading
+import time
+import weakref
 
 # This tuple contains acceptable string types
 StringTypes = (str, bytes)
@@ -77,6 +82,68 @@ class PlyLogger(object):
     info = critical
     debug = critical
 
+# -----------------------------------------------------------------------------
+# _BoundStateTable
+#
+# Per-state table of a cloned lexer that has been attached to a new object.
+# The compiled master regular expressions are shared with the lexer that was
+# cloned.  Rule functions are looked up on the new object lazily, one state at
+# a time, the first time a state is entered.  This keeps clone() independent of
+# the number of rules in the specification.  The tables may hold either rule
+# functions or just their names (see _lexer_template()).
+# -----------------------------------------------------------------------------
+
+def _rule_name(f):
+    return f if isinstance(f, str) else f.__name__
+
+def _bind_rule(f, object):
+    return f and getattr(object, _rule_name(f))
+
+def _bind_master_re(ritem, object):
+    newre = []
+    for cre, findex in ritem:
+        newfindex = []
+        for f in findex:
+            if not f or not f[0]:
+                newfindex.append(f)
+                continue
+            newfindex.append((getattr(object, _rule_name(f[0])), f[1]))
+        newre.append((cre, tuple(newfindex)))
+    return tuple(newre)
+
+def _unbind_master_re(ritem):
+    newre = []
+    for cre, findex in ritem:
+        newfindex = [(_rule_name(f[0]), f[1]) if f and f[0] else f for f in findex]
+        newre.append((cre, tuple(newfindex)))
+    return tuple(newre)
+
+class _BoundStateTable(collections.abc.Mapping):
+    def __init__(self, table, object, bind):
+        # Cloning a clone shares the original tables rather than stacking wrappers
+        if isinstance(table, _BoundStateTable):
+            table = table.table
+        self.table = table
+        self.object = object
+        self.bind = bind
+        self.bound = {}
+
+    def __getitem__(self, state):
+        try:
+            return self.bound[state]
+        except KeyError:
+            value = self.bound[state] = self.bind(self.table[state], self.object)
+            return value
+
+    def __contains__(self, state):
+        return state in self.table
+
+    def __iter__(self):
+        return iter(self.table)
+
+    def __len__(self):
+        return len(self.table)
+
 # -----------------------------------------------------------------------------
 #                        === Lexing Engine ===
 #
@@ -86,6 +153,11 @@ class PlyLogger(object):
 #    input()          -  Store a new string in the lexer
 #    token()          -  Get the next token
 #    clone()          -  Clone the lexer
+#    snapshot()       -  Save the current position
+#    restore()        -  Return to a saved position
+#    peek()           -  Look at an upcoming token
+#    unget()          -  Push a token back
+#    relex()          -  Update a token list after an edit
 #
 #    lineno           -  Current line number
 #    lexpos           -  Current position in the input string
@@ -107,6 +179,7 @@ class Lexer:
         self.lexstateignore = {}      # Dictionary of ignored characters for each state
         self.lexstateerrorf = {}      # Dictionary of error functions for each state
         self.lexstateeoff = {}        # Dictionary of eof functions for each state
+        self.lexstaterecords = {}     # Dictionary of precomputed attributes for each state
         self.lexreflags = 0           # Optional re compile flags
         self.lexdata = None           # Actual input data (as a string)
         self.lexpos = 0               # Current position in input text
@@ -118,32 +191,30 @@ class Lexer:
         self.lexliterals = ''         # Literal characters that can be passed through
         self.lexmodule = None         # Module
         self.lineno = 1               # Current line number
+        self.lexpending = []          # Ring buffer of tokens saved by peek() and unget()
+        self.lexpendstart = 0         # Index of the next pending token
+        self.lexpendcount = 0         # Number of pending tokens
+        self.lexerrors = []           # Positions at which the error rule was called
 
     def clone(self, object=None):
         c = copy.copy(self)
+        c.lexstatestack = list(self.lexstatestack)
+        c.lexerrors = list(self.lexerrors)
+        c._setpending(self._getpending())
 
         # If the object parameter has been supplied, it means we are attaching the
-        # lexer to a new object.  In this case, we have to rebind all methods in
-        # the lexstatere and lexstateerrorf tables.
+        # lexer to a new object.  The compiled state tables are shared with this
+        # lexer and only wrapped, so that the methods in the lexstatere,
+        # lexstateerrorf and lexstateeoff tables are rebound to the new object
+        # the first time each state is used.
 
         if object:
-            newtab = {}
-            for key, ritem in self.lexstatere.items():
-                newre = []
-                for cre, findex in ritem:
-                    newfindex = []
-                    for f in findex:
-                        if not f or not f[0]:
-                            newfindex.append(f)
-                            continue
-                        newfindex.append((getattr(object, f[0].__name__), f[1]))
-                newre.append((cre, newfindex))
-                newtab[key] = newre
-            c.lexstatere = newtab
-            c.lexstateerrorf = {}
-            for key, ef in self.lexstateerrorf.items():
-                c.lexstateerrorf[key] = getattr(object, ef.__name__)
+            c.lexstatere = _BoundStateTable(self.lexstatere, object, _bind_master_re)
+            c.lexstateerrorf = _BoundStateTable(self.lexstateerrorf, object, _bind_rule)
+            c.lexstateeoff = _BoundStateTable(self.lexstateeoff, object, _bind_rule)
             c.lexmodule = object
+            c.lexstaterecords = {}
+            c.begin(c.lexstate)
         return c
 
     # ------------------------------------------------------------
@@ -153,19 +224,37 @@ class Lexer:
         self.lexdata = s
         self.lexpos = 0
         self.lexlen = len(s)
+        self.lexerrors = []
+        if self.lexpendcount:
+            self._setpending(())
 
     # ------------------------------------------------------------
     # begin() - Changes the lexing state
     # ------------------------------------------------------------
     def begin(self, state):
+        try:
+            record = self.lexstaterecords[state]
+        except KeyError:
+            record = self._staterecord(state)
+        (self.lexre, self.lexretext, self.lexignore,
+         self.lexerrorf, self.lexeoff, self.lexstate) = record
+
+    # ------------------------------------------------------------
+    # _staterecord() - Collects the attributes that begin() sets for
+    # a state into a single tuple.  Records are built the first
+    # time a state is entered and reused after that.
+    # ------------------------------------------------------------
+    def _staterecord(self, state):
         if state not in self.lexstatere:
             raise ValueError(f'Undefined state {state!r}')
-        self.lexre = self.lexstatere[state]
-        self.lexretext = self.lexstateretext[state]
-        self.lexignore = self.lexstateignore.get(state, '')
-        self.lexerrorf = self.lexstateerrorf.get(state, None)
-        self.lexeoff = self.lexstateeoff.get(state, None)
-        self.lexstate = state
+        record = self.lexstaterecords[state] = (
+            self.lexstatere[state],
+            self.lexstateretext[state],
+            self.lexstateignore.get(state, ''),
+            self.lexstateerrorf.get(state, None),
+            self.lexstateeoff.get(state, None),
+            state)
+        return record
 
     # ------------------------------------------------------------
     # push_state() - Changes the lexing state and saves old on stack
@@ -192,6 +281,167 @@ class Lexer:
     def skip(self, n):
         self.lexpos += n
 
+    # ------------------------------------------------------------
+    # snapshot() - Capture the position of the lexer
+    #
+    # Returns a tuple that restore() accepts.  Only the values that
+    # change while lexing are recorded, so taking a snapshot does not
+    # depend on the size of the lexer specification or the input.
+    # ------------------------------------------------------------
+    def snapshot(self):
+        return (self.lexdata, self.lexpos, self.lineno, self.lexstate,
+                tuple(self.lexstatestack), self._getpending())
+
+    # ------------------------------------------------------------
+    # restore() - Return the lexer to a position saved by snapshot()
+    # ------------------------------------------------------------
+    def restore(self, snap):
+        lexdata, self.lexpos, self.lineno, state, stack, pending = snap
+        if lexdata is not self.lexdata:
+            self.lexdata = lexdata
+            self.lexlen = len(lexdata) if lexdata is not None else 0
+        self.lexstatestack = list(stack)
+        self._setpending(pending)
+        self.begin(state)
+
+    # ------------------------------------------------------------
+    # peek() - Return the k-th upcoming token without consuming it
+    #
+    # Tokens read ahead are kept in a ring buffer and handed out by
+    # token() before any new input is lexed.  Returns None if the
+    # input ends first.
+    # ------------------------------------------------------------
+    def peek(self, k=1):
+        if k < 1:
+            raise ValueError(f'peek() position must be at least 1, not {k}')
+        while self.lexpendcount < k:
+            # Lex a new token with the buffer hidden from token()
+            count = self.lexpendcount
+            self.lexpendcount = 0
+            try:
+                tok = self.token()
+            finally:
+                self.lexpendcount = count
+            if tok is None:
+                return None
+            self._reservepending()
+            ring = self.lexpending
+            ring[(self.lexpendstart + count) % len(ring)] = tok
+            self.lexpendcount = count + 1
+        ring = self.lexpending
+        return ring[(self.lexpendstart + k - 1) % len(ring)]
+
+    # ------------------------------------------------------------
+    # unget() - Push a token back so that token() returns it next
+    # ------------------------------------------------------------
+    def unget(self, tok):
+        self._reservepending()
+        ring = self.lexpending
+        self.lexpendstart = (self.lexpendstart - 1) % len(ring)
+        ring[self.lexpendstart] = tok
+        self.lexpendcount += 1
+
+    # ------------------------------------------------------------
+    # Ring buffer helpers for peek() and unget()
+    # ------------------------------------------------------------
+    def _nextpending(self):
+        ring = self.lexpending
+        start = self.lexpendstart
+        tok = ring[start]
+        ring[start] = None
+        self.lexpendstart = (start + 1) % len(ring)
+        self.lexpendcount -= 1
+        return tok
+
+    def _reservepending(self):
+        # Make room for one more token, doubling the buffer when full
+        if self.lexpendcount == len(self.lexpending):
+            pending = self._getpending()
+            self.lexpending = list(pending) + [None] * max(len(pending), 4)
+            self.lexpendstart = 0
+
+    def _getpending(self):
+        ring = self.lexpending
+        start = self.lexpendstart
+        return tuple(ring[(start + i) % len(ring)] for i in range(self.lexpendcount))
+
+    def _setpending(self, pending):
+        self.lexpending = list(pending)
+        self.lexpendstart = 0
+        self.lexpendcount = len(pending)
+
+    # ------------------------------------------------------------
+    # relex() - Update a token list after an edit of the input
+    #
+    # tokens must be the tokens read from the current input.  The
+    # text lexdata[offset:offset+removed] is replaced by text and
+    # lexing restarts at the last token before the line holding the
+    # edit.  Characters skipped by the error rule before the edit may
+    # now begin a token that reaches it, so if there are any, lexing
+    # restarts at the last token before the first of them.  It stops
+    # at the first new token past the edit that matches an old token
+    # at the same place, with the lexer back in the INITIAL state.
+    # tokens is updated in place and the tokens after the edit are
+    # moved.  Returns (start, end, new) where the old tokens[start:end]
+    # have been replaced by the list new.
+    # ------------------------------------------------------------
+    def relex(self, tokens, offset, removed, text):
+        data = self.lexdata
+        if offset < 0 or removed < 0 or offset + removed > len(data):
+            raise ValueError(f'Edit of {removed} characters at {offset} is outside the input')
+        errors = self.lexerrors
+        self.input(data[:offset] + text + data[offset + removed:])
+        delta = len(text) - removed
+        editend = offset + len(text)
+
+        # Tokens starting before the line with the edit (and before any
+        # skipped characters) are not changed
+        restart = min([pos for pos in errors if pos < offset] +
+                      [data.rfind('\n', 0, offset) + 1])
+        start = _token_index(tokens, restart)
+        restart = 0
+        if start:
+            start -= 1
+            restart = self.lexpos = tokens[start].lexpos
+            self.lineno = tokens[start].lineno
+        else:
+            self.lineno = 1
+        self.lexstatestack = []
+        self.begin('INITIAL')
+
+        new = []
+        end = old = _token_index(tokens, offset + removed)
+        lines = 0
+        while True:
+            tok = self.token()
+            if tok is None:
+                end = len(tokens)
+                break
+            if tok.lexpos >= editend and self.lexstate == 'INITIAL' and not self.lexstatestack:
+                pos = tok.lexpos - delta
+                while old < len(tokens) and tokens[old].lexpos < pos:
+                    old += 1
+                if old < len(tokens):
+                    oldtok = tokens[old]
+                    if oldtok.lexpos == pos and oldtok.type == tok.type and oldtok.value == tok.value:
+                        end = old
+                        lines = tok.lineno - oldtok.lineno
+                        break
+            new.append(tok)
+
+        # Errors after the new tokens are the old ones, moved like the tokens
+        resync = tokens[end].lexpos if end < len(tokens) else len(data)
+        self.lexerrors = ([pos for pos in errors if pos < restart] + self.lexerrors +
+                          [pos + delta for pos in errors if pos >= resync])
+
+        if delta or lines:
+            for n in range(end, len(tokens)):
+                tok = tokens[n]
+                tok.lexpos += delta
+                tok.lineno += lines
+        tokens[start:end] = new
+        return start, end, new
+
     # ------------------------------------------------------------
     # token() - Return the next token from the Lexer
     #
@@ -200,6 +450,10 @@ class Lexer:
     # you are doing
     # ------------------------------------------------------------
     def token(self):
+        # Tokens saved by peek() or unget() come first
+        if self.lexpendcount:
+            return self._nextpending()
+
         # Make local copies of frequently referenced attributes
         lexpos    = self.lexpos
         lexlen    = self.lexlen
@@ -273,6 +527,7 @@ class Lexer:
                     tok.lexer = self
                     tok.lexpos = lexpos
                     self.lexpos = lexpos
+                    self.lexerrors.append(lexpos)
                     newtok = self.lexerrorf(tok)
                     if lexpos == self.lexpos:
                         # Error method didn't change text position at all. This is an error.
@@ -313,6 +568,17 @@ class Lexer:
             raise StopIteration
         return t
 
+# Number of tokens in the sorted list tokens that start before pos
+def _token_index(tokens, pos):
+    lo, hi = 0, len(tokens)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if tokens[mid].lexpos < pos:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
 # -----------------------------------------------------------------------------
 #                           ==== Lex Builder ===
 #
@@ -340,19 +606,67 @@ def get_caller_module_dict(levels):
     f = sys._getframe(levels)
     return { **f.f_globals, **f.f_locals }
 
+# -----------------------------------------------------------------------------
+# _get_backend()
+#
+# Returns the regular expression engine used to build a lexer.  The lexer needs
+# very little from it:
+#
+#    compile(pattern, flags)  -  returns a pattern object with a groupindex
+#                                mapping and a match(string, pos) method
+#    error                    -  exception raised for invalid patterns
+#
+# Match objects must provide group(), end() and lastindex.  The re module is
+# the default.  Other engines with the same interface, such as the third-party
+# regex module, can be given as a module or by module name.
+# -----------------------------------------------------------------------------
+def _get_backend(backend):
+    if backend is None:
+        return re
+    if isinstance(backend, str):
+        return importlib.import_module(backend)
+    return backend
+
 # -----------------------------------------------------------------------------
 # _form_master_re()
 #
 # This function takes a list of all of the regex components and attempts to
-# form the master regular expression.  Given limitations in the Python re
-# module, it may be necessary to break the master regex into separate expressions.
+# form the master regular expression.  Components that define the same inner
+# group name cannot share a regex, so the list is first cut into as few
+# consecutive segments as possible with no name clashes.  Each segment is then
+# compiled once.  If a segment still fails to compile (for example because the
+# regex engine limits the number of groups), it is split in half until it does.
 # -----------------------------------------------------------------------------
-def _form_master_re(relist, reflags, ldict, toknames):
-    if not relist:
-        return [], [], []
+def _form_master_re(relist, reflags, ldict, toknames, backend=re):
+    segments = []
+    current = []
+    names = set()
+    for regex in relist:
+        try:
+            groups = set(backend.compile(regex, reflags).groupindex)
+        except Exception:
+            groups = set()
+        if current and not names.isdisjoint(groups):
+            segments.append(current)
+            current = []
+            names = set()
+        current.append(regex)
+        names.update(groups)
+    if current:
+        segments.append(current)
+
+    lexre, re_text, re_names = [], [], []
+    for segment in segments:
+        llist, lre, lnames = _compile_master_re(segment, reflags, ldict, toknames, backend)
+        lexre.extend(llist)
+        re_text.extend(lre)
+        re_names.extend(lnames)
+    return lexre, re_text, re_names
+
+def _compile_master_re(relist, reflags, ldict, toknames, backend):
     regex = '|'.join(relist)
     try:
-        lexre = re.compile(regex, reflags)
+        lexre = backend.compile(regex, reflags)
 
         # Build the index to function map for the matching engine
         lexindexfunc = [None] * (max(lexre.groupindex.values()) + 1)
@@ -370,13 +684,707 @@ def _form_master_re(relist, reflags, ldict, toknames):
                 else:
                     lexindexfunc[i] = (None, toknames[f])
 
-        return [(lexre, lexindexfunc)], [regex], [lexindexnames]
+        return [(lexre, tuple(lexindexfunc))], [regex], [lexindexnames]
     except Exception:
-        m = (len(relist) // 2) + 1
-        llist, lre, lnames = _form_master_re(relist[:m], reflags, ldict, toknames)
-        rlist, rre, rnames = _form_master_re(relist[m:], reflags, ldict, toknames)
+        if len(relist) == 1:
+            raise
+        m = (len(relist) + 1) // 2
+        llist, lre, lnames = _compile_master_re(relist[:m], reflags, ldict, toknames, backend)
+        rlist, rre, rnames = _compile_master_re(relist[m:], reflags, ldict, toknames, backend)
         return (llist+rlist), (lre+rre), (lnames+rnames)
 
+# -----------------------------------------------------------------------------
+#                       === DFA matching engine ===
+#
+# When lex() is called with dfa=True, the master regular expressions of each
+# state are compiled into a single minimized DFA that is run with table
+# lookups.  The DFA object stands in for a compiled regular expression in the
+# lexstatere tables, so token() does not know which engine it is using.
+#
+# The DFA finds the same match as re.  Rules are tried in PLY's priority order
+# (function rules by line number, then strings by decreasing regex length),
+# alternatives from left to right, greedy repeats with as many iterations as
+# possible and lazy repeats with as few.  As in RE2, a DFA state is an ordered
+# set of NFA states: the states that re would try after one that accepts can
+# never be chosen and are dropped, and the last accepting state reached gives
+# the match.  So r'=|==' matches '=' of '==', and r'/\*(.|\n)*?\*/' stops at
+# the first '*/'.  States whose rules use constructs that a DFA cannot express
+# (backreferences, lookaround, anchors, case-insensitive matching) keep using
+# re.  Characters outside Latin-1 that no rule mentions explicitly are handed to
+# re as well.
+# -----------------------------------------------------------------------------
+
+try:
+    from re import _parser as _sre_parse
+except ImportError:                               # Python < 3.11
+    import sre_parse as _sre_parse
+
+_DFA_MAX_STATES = 10000         # Give up on DFAs larger than this
+_DFA_MAX_REPEAT = 100           # Give up on bounded repeats larger than this
+
+class _DFAUnsupported(Exception):
+    pass
+
+# Membership test for a character set produced by the re parser
+def _dfa_charset_member(kind, av, flags, ch):
+    if kind is _sre_parse.LITERAL:
+        return ord(ch) == av
+    if kind is _sre_parse.NOT_LITERAL:
+        return ord(ch) != av
+    if kind is _sre_parse.ANY:
+        return bool(flags & re.DOTALL) or ch != '\n'
+    # IN: a list of literals, ranges and categories, possibly negated
+    negate = False
+    found = False
+    c = ord(ch)
+    for op, arg in av:
+        if op is _sre_parse.NEGATE:
+            negate = True
+        elif op is _sre_parse.LITERAL:
+            found = c == arg
+        elif op is _sre_parse.RANGE:
+            found = arg[0] <= c <= arg[1]
+        elif op is _sre_parse.CATEGORY:
+            found = _dfa_category_member(arg, flags, ch)
+        else:
+            raise _DFAUnsupported(f'character set item {op}')
+        if found:
+            break
+    return found != negate
+
+def _dfa_category_member(cat, flags, ch):
+    ascii = flags & re.ASCII
+    if cat in (_sre_parse.CATEGORY_DIGIT, _sre_parse.CATEGORY_NOT_DIGIT):
+        found = '0' <= ch <= '9' if ascii else ch.isdecimal()
+    elif cat in (_sre_parse.CATEGORY_SPACE, _sre_parse.CATEGORY_NOT_SPACE):
+        found = ch in ' \t\n\r\f\v' if ascii else ch.isspace()
+    elif cat in (_sre_parse.CATEGORY_WORD, _sre_parse.CATEGORY_NOT_WORD):
+        found = ch == '_' or (ch.isalnum() and (not ascii or ch.isascii()))
+    else:
+        raise _DFAUnsupported(f'category {cat}')
+    if cat in (_sre_parse.CATEGORY_NOT_DIGIT, _sre_parse.CATEGORY_NOT_SPACE,
+               _sre_parse.CATEGORY_NOT_WORD):
+        found = not found
+    return found
+
+# -----------------------------------------------------------------------------
+# _DFABuilder
+#
+# Builds a Thompson NFA from the parsed rules and turns it into a DFA by
+# subset construction.  Characters are grouped into classes that no rule
+# tells apart, so that transitions are computed once per class.
+# -----------------------------------------------------------------------------
+
+class _DFABuilder:
+    def __init__(self):
+        self.eps = []           # NFA state -> epsilon targets, most preferred first
+        self.edges = []         # NFA state -> list of (charset, target)
+        self.accept = []        # NFA state -> rule number or 0
+        self.bodies = set()     # NFA states that start an iteration of a repeat
+        self.loopback = {}      # NFA state ending an iteration -> (its start, repeat end)
+        self.charsets = {}      # (kind, av, flags) -> charset number
+        self.chars = set(map(chr, range(256)))
+
+    def newstate(self):
+        self.eps.append([])
+        self.edges.append([])
+        self.accept.append(0)
+        return len(self.eps) - 1
+
+    # Add the NFA for one rule.  Rules are preferred in the order they are added.
+    def addrule(self, pattern, start, flags, rule):
+        entry = self.newstate()
+        self.eps[start].append(entry)
+        final = self.newstate()
+        self.eps[self.add(pattern, entry, flags)].append(final)
+        self.accept[final] = rule
+
+    def charset(self, kind, av, flags):
+        if kind is _sre_parse.IN:
+            av = tuple(av)
+            for op, arg in av:
+                if op is _sre_parse.LITERAL:
+                    self.chars.add(chr(arg))
+                elif op is _sre_parse.RANGE:
+                    self.chars.update((chr(arg[0]), chr(arg[1])))
+        elif kind is not _sre_parse.ANY:
+            self.chars.add(chr(av))
+        key = (kind, av, flags & (re.DOTALL | re.ASCII))
+        return self.charsets.setdefault(key, len(self.charsets))
+
+    # Add the NFA for a parsed pattern starting at state start.  Returns the end
+    # state.  Every choice is an epsilon split whose targets are listed in the
+    # order re tries them.  Optional iterations of a repeat are recorded so that
+    # closure() can apply re's rule that an empty iteration ends the repeat.
+    def add(self, pattern, start, flags):
+        for op, av in pattern:
+            if op in (_sre_parse.LITERAL, _sre_parse.NOT_LITERAL, _sre_parse.ANY, _sre_parse.IN):
+                end = self.newstate()
+                self.edges[start].append((self.charset(op, av, flags), end))
+                start = end
+            elif op is _sre_parse.BRANCH:
+                end = self.newstate()
+                for alt in av[1]:
+                    entry = self.newstate()
+                    self.eps[start].append(entry)
+                    self.eps[self.add(alt, entry, flags)].append(end)
+                start = end
+            elif op is _sre_parse.SUBPATTERN:
+                group, add_flags, del_flags, p = av
+                if add_flags & (re.IGNORECASE | re.LOCALE):
+                    raise _DFAUnsupported('case-insensitive group')
+                start = self.add(p, start, (flags | add_flags) & ~del_flags)
+            elif op is _sre_parse.MAX_REPEAT or op is _sre_parse.MIN_REPEAT:
+                low, high, p = av
+                if low > _DFA_MAX_REPEAT or (high != _sre_parse.MAXREPEAT and high > _DFA_MAX_REPEAT):
+                    raise _DFAUnsupported('repeat count too large')
+                greedy = op is _sre_parse.MAX_REPEAT
+                for _ in range(low):
+                    start = self.add(p, start, flags)
+                end = self.newstate()
+                if high == _sre_parse.MAXREPEAT:
+                    loop = self.newstate()
+                    body = self.newstate()
+                    self.eps[start].append(loop)
+                    self.eps[loop].extend((body, end) if greedy else (end, body))
+                    last = self.add(p, body, flags)
+                    self.eps[last].append(loop)
+                    self.bodies.add(body)
+                    self.loopback[last] = (body, end)
+                else:
+                    for _ in range(high - low):
+                        body = self.newstate()
+                        self.eps[start].extend((body, end) if greedy else (end, body))
+                        start = self.add(p, body, flags)
+                        self.bodies.add(body)
+                        self.loopback[start] = (body, end)
+                    self.eps[start].append(end)
+                start = end
+            else:
+                raise _DFAUnsupported(str(op).lower())
+            if len(self.eps) > _DFA_MAX_STATES * 10:
+                raise _DFAUnsupported('pattern too large')
+        return start
+
+    # Follow epsilon moves from the given NFA states, most preferred first.
+    # Returns the states that consume characters, in order of preference, and
+    # the rule accepted, if any.  Anything less preferred than an accepting
+    # state can never be chosen by re, so it is dropped.  Each path carries the
+    # iterations it started without consuming anything: when one of them ends,
+    # re goes on after the repeat instead of trying another iteration.
+    def closure(self, states):
+        eps = self.eps
+        edges = self.edges
+        accept = self.accept
+        bodies = self.bodies
+        loopback = self.loopback
+        result = []
+        consuming = set()
+        seen = set()
+        stack = [(s, frozenset()) for s in reversed(states)]
+        while stack:
+            item = stack.pop()
+            if item in seen:
+                continue
+            seen.add(item)
+            s, empty = item
+            if accept[s]:
+                return tuple(result), accept[s]
+            if edges[s] and s not in consuming:
+                consuming.add(s)
+                result.append(s)
+            if s in bodies:
+                empty = empty | {s}
+            body, end = loopback.get(s, (None, None))
+            if body in empty:
+                stack.append((end, empty))
+            else:
+                stack.extend((t, empty) for t in reversed(eps[s]))
+        return tuple(result), 0
+
+    # Group the characters mentioned by the rules into classes that every
+    # charset either fully contains or does not contain at all.
+    def classes(self):
+        members = [(kind, av, flags) for (kind, av, flags), _ in
+                   sorted(self.charsets.items(), key=lambda item: item[1])]
+        signatures = {}
+        charclass = {}
+        for ch in sorted(self.chars):
+            sig = tuple(_dfa_charset_member(kind, av, flags, ch) for kind, av, flags in members)
+            charclass[ch] = signatures.setdefault(sig, len(signatures))
+        classsets = [[] for _ in members]
+        for sig, k in signatures.items():
+            for n, inset in enumerate(sig):
+                if inset:
+                    classsets[n].append(k)
+        return charclass, len(signatures), classsets
+
+    # Subset construction over ordered sets of NFA states.  Returns transitions
+    # (per DFA state, per class) and the rule accepted in each DFA state.
+    def subsets(self, start, nclasses, classsets):
+        edges = self.edges
+        first = self.closure([start])
+        index = {first: 0}
+        todo = [first]
+        trans = []
+        best = []
+        while todo:
+            states, rule = todo.pop(0)
+            moves = {}
+            for s in states:
+                for cs, t in edges[s]:
+                    for k in classsets[cs]:
+                        moves.setdefault(k, []).append(t)
+            row = [-1] * nclasses
+            for k, targets in moves.items():
+                target = self.closure(targets)
+                if target not in index:
+                    if len(index) >= _DFA_MAX_STATES:
+                        raise _DFAUnsupported('too many DFA states')
+                    index[target] = len(index)
+                    todo.append(target)
+                row[k] = index[target]
+            trans.append(row)
+            best.append(rule)
+        return trans, best
+
+# -----------------------------------------------------------------------------
+# _dfa_minimize()
+#
+# Merges equivalent DFA states.  Only the rule accepted in a state is
+# observable while matching, so states start out grouped by that rule and
+# are split until every group has the same transitions.
+# -----------------------------------------------------------------------------
+
+def _dfa_minimize(trans, best):
+    block = list(best)
+    count = len(set(block))
+    while True:
+        keys = {}
+        newblock = []
+        for s, row in enumerate(trans):
+            key = (block[s], tuple(block[t] if t >= 0 else -1 for t in row))
+            newblock.append(keys.setdefault(key, len(keys)))
+        if len(keys) == count:
+            break
+        block = newblock
+        count = len(keys)
+
+    # Renumber so that the start state is 0
+    order = {}
+    for s in range(len(trans)):
+        order.setdefault(newblock[s], len(order))
+    newtrans = [None] * len(order)
+    newbest = [0] * len(order)
+    for s, row in enumerate(trans):
+        n = order[newblock[s]]
+        if newtrans[n] is None:
+            newtrans[n] = [order[newblock[t]] if t >= 0 else -1 for t in row]
+            newbest[n] = best[s]
+    return newtrans, newbest
+
+# -----------------------------------------------------------------------------
+# _DFAMatch
+#
+# Result of a DFA match.  group() with no arguments, end() and lastindex are
+# answered directly.  Anything else (named groups used by rule functions
+# through lexer.lexmatch, for instance) is answered by matching the rule's
+# master regular expression at the same position.
+# -----------------------------------------------------------------------------
+
+class _DFAMatch:
+    __slots__ = ('string', 'pos', '_end', 'lastindex', '_lexre', '_match')
+
+    def __init__(self, string, pos, end, lastindex, lexre, match=None):
+        self.string = string
+        self.pos = pos
+        self._end = end
+        self.lastindex = lastindex
+        self._lexre = lexre
+        self._match = match
+
+    def _real(self):
+        if self._match is None:
+            self._match = self._lexre.match(self.string, self.pos)
+        return self._match
+
+    def group(self, *args):
+        if not args or args == (0,):
+            return self.string[self.pos:self._end]
+        return self._real().group(*args)
+
+    def start(self, *args):
+        return self._real().start(*args) if args else self.pos
+
+    def end(self, *args):
+        return self._real().end(*args) if args else self._end
+
+    def span(self, *args):
+        return self._real().span(*args) if args else (self.pos, self._end)
+
+    def __getattr__(self, name):
+        return getattr(self._real(), name)
+
+# -----------------------------------------------------------------------------
+# _DFAMatcher
+#
+# Matches all rules of one lexer state.  It is built from the list of
+# (master regex, findex) pairs of the state and replaces that list with a
+# single pair (matcher, findex) where findex is indexed by rule number.
+# -----------------------------------------------------------------------------
+
+class _DFAMatcher:
+    def __init__(self, ritem):
+        builder = _DFABuilder()
+        start = builder.newstate()
+        self.rules = [None]             # Rule number -> (master regex, group number)
+        self.rulenumber = {}            # (master regex, group number) -> rule number
+        self.lexre = tuple(lexre for lexre, _ in ritem)   # Used when a character is not
+                                                          # in the DFA's alphabet
+
+        for lexre, _ in ritem:
+            flags = lexre.flags
+            if flags & (re.IGNORECASE | re.LOCALE):
+                raise _DFAUnsupported('case-insensitive matching')
+            try:
+                parsed = _sre_parse.parse(lexre.pattern, flags)
+            except re.error:
+                raise _DFAUnsupported('pattern is not re syntax')
+            if len(parsed.data) == 1 and parsed.data[0][0] is _sre_parse.BRANCH:
+                alternatives = parsed.data[0][1][1]
+            else:
+                alternatives = [parsed]
+            for alt in alternatives:
+                if len(alt) != 1 or alt[0][0] is not _sre_parse.SUBPATTERN:
+                    raise _DFAUnsupported('unexpected master regex layout')
+                group = alt[0][1][0]
+                self.rulenumber[lexre, group] = len(self.rules)
+                self.rules.append((lexre, group))
+                builder.addrule([alt[0]], start, flags, len(self.rules) - 1)
+
+        charclass, nclasses, classsets = builder.classes()
+        trans, best = builder.subsets(start, nclasses, classsets)
+        trans, best = _dfa_minimize(trans, best)
+
+        # Tables used by match().  Each state maps characters directly to the
+        # next state, leaving out transitions to the dead state.
+        self.nstates = len(trans)
+        self.alphabet = frozenset(charclass)
+        self.accept = best
+        self.rows = [{ch: row[k] for ch, k in charclass.items() if row[k] >= 0}
+                     for row in trans]
+
+    def match(self, data, pos):
+        rows = self.rows
+        accept = self.accept
+        best = accept[0]
+        end = pos if best else -1
+        state = 0
+        i = pos
+        n = len(data)
+        while i < n:
+            state = rows[state].get(data[i])
+            if state is None:
+                if data[i] not in self.alphabet:
+                    return self._fallback(data, pos)
+                break
+            i += 1
+            if accept[state]:
+                best = accept[state]
+                end = i
+        if end < 0:
+            return None
+        lexre, group = self.rules[best]
+        return _DFAMatch(data, pos, end, best, lexre)
+
+    # Match with the original regular expressions and translate the result
+    def _fallback(self, data, pos):
+        for lexre in self.lexre:
+            m = lexre.match(data, pos)
+            if m:
+                rule = self.rulenumber[lexre, m.lastindex]
+                return _DFAMatch(data, pos, m.end(), rule, lexre, m)
+        return None
+
+# -----------------------------------------------------------------------------
+# _form_dfa()
+#
+# Replaces the master regular expressions of a state by a DFA matcher.  Returns
+# the new table entry and None, or the old entry and the reason a DFA could
+# not be built.
+# -----------------------------------------------------------------------------
+
+def _form_dfa(ritem):
+    if not ritem:
+        return ritem, None
+    try:
+        matcher = _DFAMatcher(ritem)
+    except _DFAUnsupported as e:
+        return ritem, str(e)
+    lexindexfuncs = dict(ritem)
+    findex = (None,) + tuple(lexindexfuncs[lexre][group] for lexre, group in matcher.rules[1:])
+    return ((matcher, findex),), None
+
+# -----------------------------------------------------------------------------
+# _literal_rule()
+#
+# Returns the text matched by a rule regex made only of literal characters
+# (keywords and operators such as r'while' or r'\+='), or None otherwise.
+# -----------------------------------------------------------------------------
+def _literal_rule(regex, reflags):
+    if reflags & re.IGNORECASE:
+        return None
+    try:
+        parsed = _sre_parse.parse(regex, reflags)
+    except Exception:
+        return None
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+    chars = []
+    for op, av in parsed:
+        if op is not _sre_parse.LITERAL:
+            return None
+        chars.append(chr(av))
+    return ''.join(chars) or None
+
+# -----------------------------------------------------------------------------
+# _form_literal_trie()
+#
+# Builds one regex for a list of (rulename, text) literal rules with common
+# prefixes factored out, so that re does not try every keyword in turn.  An
+# empty named group marks where each literal ends.  It is the last group to
+# close in a match, so lastindex still identifies the rule that matched.
+# Optional continuations are greedy, so the longest literal wins.
+# -----------------------------------------------------------------------------
+def _form_literal_trie(rules):
+    trie = {}
+    for name, text in rules:
+        node = trie
+        for ch in text:
+            node = node.setdefault(ch, {})
+        node[None] = name
+
+    def emit(node):
+        term = '(?P<%s>)' % node[None] if None in node else ''
+        branches = [re.escape(ch) + emit(child) for ch, child in node.items() if ch is not None]
+        if not branches:
+            return term
+        if len(branches) == 1:
+            body = branches[0]
+            return term + '(?:%s)?' % body if term else body
+        body = '(?:%s)' % '|'.join(branches)
+        return term + body + '?' if term else body
+
+    return '(?:%s)' % emit(trie)
+
+# -----------------------------------------------------------------------------
+# _merge_literal_rules()
+#
+# Turns the string rules of a state into master regex components.  Runs of
+# consecutive literal rules are merged into a single trie.  A run is cut
+# before a literal that extends an earlier literal of the run, since the
+# earlier (shorter) one has priority there and a trie would prefer the longer.
+# -----------------------------------------------------------------------------
+def _merge_literal_rules(strsym, reflags):
+    regex_list = []
+    run = []
+
+    def flush():
+        if len(run) == 1:
+            name, text, r = run[0]
+            regex_list.append('(?P<%s>%s)' % (name, r))
+        elif run:
+            regex_list.append(_form_literal_trie([(name, text) for name, text, r in run]))
+        del run[:]
+
+    for name, r in strsym:
+        text = _literal_rule(r, reflags)
+        if text is None:
+            flush()
+            regex_list.append('(?P<%s>%s)' % (name, r))
+            continue
+        if any(text.startswith(prev) for _, prev, _ in run):
+            flush()
+        run.append((name, text, r))
+    flush()
+    return regex_list
+
+# -----------------------------------------------------------------------------
+#                     === Backtracking analysis ===
+#
+# re is a backtracking engine.  A rule such as r'(\w+\s?)+' can match the
+# same text in exponentially many ways, and when the overall match then fails
+# re tries all of them.  The functions below look for the usual patterns
+# behind this in a rule's parsed regex:
+#
+#   - a repeated group whose optional tail can also start the next iteration,
+#     as in (a+)+, (\w+\s?)+ or (a|aa)+
+#   - a repeated group holding an unbounded repeat that can match both the
+#     text after it and the start of the next iteration, as in (.*,)*
+#   - a repeated group with alternatives that can start with the same character,
+#     or with more than one alternative that can match empty, as in (\w|\d\d)+
+#     or (a|a)+, which re parses as a(|)
+#   - unbounded repeats next to each other that match the same characters, as in
+#     \d+\d* or .*.*  These only cost polynomial time.
+#
+# The analysis is conservative and may report rules that are fine in practice.
+# -----------------------------------------------------------------------------
+
+_bt_repeats = (_sre_parse.MAX_REPEAT, _sre_parse.MIN_REPEAT)
+_bt_charsets = (_sre_parse.LITERAL, _sre_parse.NOT_LITERAL, _sre_parse.ANY, _sre_parse.IN)
+
+# Returns the character sets that can start a pattern and whether it can match empty
+def _bt_first(seq):
+    atoms = []
+    for op, av in seq:
+        if op in _bt_charsets:
+            atoms.append((op, av))
+            return atoms, False
+        if op is _sre_parse.BRANCH:
+            nullable = False
+            for alt in av[1]:
+                a, n = _bt_first(alt)
+                atoms.extend(a)
+                nullable = nullable or n
+        elif op is _sre_parse.SUBPATTERN:
+            a, nullable = _bt_first(av[3])
+            atoms.extend(a)
+        elif op in _bt_repeats:
+            a, nullable = _bt_first(av[2])
+            atoms.extend(a)
+            nullable = nullable or av[0] == 0
+        elif op in (_sre_parse.AT, _sre_parse.ASSERT, _sre_parse.ASSERT_NOT):
+            nullable = True
+        else:
+            # Backreferences, atomic groups and anything else: assume the worst
+            atoms.append((_sre_parse.ANY, None))
+            nullable = True
+        if not nullable:
+            return atoms, False
+    return atoms, True
+
+# Returns the character sets that can start text matched by the optional end
+# of a pattern: extra iterations of a trailing repeat or trailing nullable parts.
+def _bt_optional_tail(seq):
+    atoms = []
+    for op, av in reversed(seq):
+        if op is _sre_parse.SUBPATTERN:
+            atoms.extend(_bt_optional_tail(av[3]))
+        elif op is _sre_parse.BRANCH:
+            for alt in av[1]:
+                atoms.extend(_bt_optional_tail(alt))
+        elif op in _bt_repeats:
+            if av[1] > 1:
+                atoms.extend(_bt_first(av[2])[0])
+            atoms.extend(_bt_optional_tail(av[2]))
+        first, nullable = _bt_first([(op, av)])
+        if not nullable:
+            break
+        atoms.extend(first)
+    return atoms
+
+# Returns the bodies of the unbounded repeats in a pattern, not counting nested
+# repeats, with the character sets that can start the text after each of them.
+# follow holds the character sets that can start the text after the pattern.
+def _bt_unbounded(seq, follow):
+    seq = list(seq)
+    for i, (op, av) in enumerate(seq):
+        after, nullable = _bt_first(seq[i+1:])
+        if nullable:
+            after = after + follow
+        if op in _bt_repeats and av[1] == _sre_parse.MAXREPEAT:
+            yield av[2], after
+        elif op is _sre_parse.SUBPATTERN:
+            yield from _bt_unbounded(av[3], after)
+        elif op is _sre_parse.BRANCH:
+            for alt in av[1]:
+                yield from _bt_unbounded(alt, after)
+
+# Returns the alternatives of all branches in a pattern, not counting nested repeats
+def _bt_branches(seq):
+    for op, av in seq:
+        if op is _sre_parse.BRANCH:
+            yield av[1]
+            for alt in av[1]:
+                yield from _bt_branches(alt)
+        elif op is _sre_parse.SUBPATTERN:
+            yield from _bt_branches(av[3])
+
+def _bt_overlap(atoms1, atoms2, flags):
+    chars = set(map(chr, range(256)))
+    for kind, av in atoms1 + atoms2:
+        if kind in (_sre_parse.LITERAL, _sre_parse.NOT_LITERAL):
+            chars.add(chr(av))
+        elif kind is _sre_parse.IN:
+            chars.update(chr(arg) if op is _sre_parse.LITERAL else chr(arg[0])
+                         for op, arg in av if op in (_sre_parse.LITERAL, _sre_parse.RANGE))
+    try:
+        for ch in chars:
+            if (any(_dfa_charset_member(kind, av, flags, ch) for kind, av in atoms1) and
+                any(_dfa_charset_member(kind, av, flags, ch) for kind, av in atoms2)):
+                return True
+    except _DFAUnsupported:
+        return True
+    return False
+
+# -----------------------------------------------------------------------------
+# _backtracking_risks()
+#
+# Returns a list of (severity, description) for a rule regex, where severity is
+# 'exponential' or 'polynomial'.
+# -----------------------------------------------------------------------------
+def _backtracking_risks(regex, reflags):
+    try:
+        parsed = _sre_parse.parse(regex, reflags)
+    except Exception:
+        return []
+    flags = parsed.state.flags
+    risks = []
+
+    def report(severity, description):
+        if (severity, description) not in risks:
+            risks.append((severity, description))
+
+    def walk(seq):
+        items = list(seq)
+        for i, (op, av) in enumerate(items):
+            if op in _bt_repeats:
+                low, high, body = av
+                if high > 1:
+                    first = _bt_first(body)[0]
+                    if _bt_overlap(_bt_optional_tail(body), first, flags):
+                        report('exponential', 'nested repeats can match the same text')
+                    for inner, after in _bt_unbounded(body, first):
+                        inner = _bt_first(inner)[0]
+                        if _bt_overlap(inner, first, flags) and _bt_overlap(inner, after, flags):
+                            report('exponential', 'nested repeats can match the same text')
+                            break
+                    for alts in _bt_branches(body):
+                        firsts = [_bt_first(alt) for alt in alts]
+                        if (sum(nullable for _, nullable in firsts) > 1 or
+                            any(_bt_overlap(a, b, flags)
+                                for n, (a, _) in enumerate(firsts) for b, _ in firsts[n+1:])):
+                            report('exponential', 'alternatives of a repeated group overlap')
+                            break
+                if high == _sre_parse.MAXREPEAT:
+                    first = _bt_first(body)[0]
+                    for op2, av2 in items[i+1:]:
+                        if (op2 in _bt_repeats and av2[1] == _sre_parse.MAXREPEAT and
+                            _bt_overlap(first, _bt_first(av2[2])[0], flags)):
+                            report('polynomial', 'adjacent repeats match the same characters')
+                            break
+                        if not _bt_first([(op2, av2)])[1]:
+                            break
+                walk(body)
+            elif op is _sre_parse.SUBPATTERN:
+                walk(av[3])
+            elif op is _sre_parse.BRANCH:
+                for alt in av[1]:
+                    walk(alt)
+
+    walk(parsed)
+    return risks
+
 # -----------------------------------------------------------------------------
 # def _statetoken(s,names)
 #
@@ -410,8 +1418,10 @@ def _statetoken(s, names):
 # user's input file.
 # -----------------------------------------------------------------------------
 class LexerReflect(object):
-    def __init__(self, ldict, log=None, reflags=0):
+    def __init__(self, ldict, log=None, reflags=0, check_backtracking=False, backend=re):
         self.ldict      = ldict
+        self.backend    = backend
+        self.check_backtracking = check_backtracking
         self.error_func = None
         self.tokens     = []
         self.reflags    = reflags
@@ -511,6 +1521,21 @@ class LexerReflect(object):
                         continue
                     self.stateinfo[name] = statetype
 
+    # Compute a signature over the token specification
+    def signature(self):
+        parts = [str(self.reflags), ' '.join(self.tokens), ''.join(self.literals)]
+        for state, stype in self.stateinfo.items():
+            parts.append('%s:%s' % (state, stype))
+            for fname, f in self.funcsym[state]:
+                parts.append('%s=%s' % (fname, _get_regex(f)))
+            for name, r in self.strsym[state]:
+                parts.append('%s=%s' % (name, r))
+            parts.append(repr(self.ignore.get(state)))
+            for funcs in (self.errorf, self.eoff):
+                f = funcs.get(state)
+                parts.append(f.__name__ if f else '')
+        return '\n'.join(parts)
+
     # Get all of the symbols with a t_ prefix and sort them into various
     # categories (functions, strings, error functions, and ignore characters)
 
@@ -612,11 +1637,13 @@ class LexerReflect(object):
                     continue
 
                 try:
-                    c = re.compile('(?P<%s>%s)' % (fname, _get_regex(f)), self.reflags)
+                    c = self.backend.compile('(?P<%s>%s)' % (fname, _get_regex(f)), self.reflags)
                     if c.match(''):
                         self.log.error("%s:%d: Regular expression for rule %r matches empty string", file, line, f.__name__)
                         self.error = True
-                except re.error as e:
+                    elif self.check_backtracking:
+                        self.validate_backtracking(f.__name__, _get_regex(f), '%s:%d: ' % (file, line))
+                except self.backend.error as e:
                     self.log.error("%s:%d: Invalid regular expression for rule '%s'. %s", file, line, f.__name__, e)
                     if '#' in _get_regex(f):
                         self.log.error("%s:%d. Make sure '#' in rule %r is escaped with '\\#'", file, line, f.__name__)
@@ -636,11 +1663,13 @@ class LexerReflect(object):
                     continue
 
                 try:
-                    c = re.compile('(?P<%s>%s)' % (name, r), self.reflags)
+                    c = self.backend.compile('(?P<%s>%s)' % (name, r), self.reflags)
                     if (c.match('')):
                         self.log.error("Regular expression for rule %r matches empty string", name)
                         self.error = True
-                except re.error as e:
+                    elif self.check_backtracking:
+                        self.validate_backtracking(name, r, '')
+                except self.backend.error as e:
                     self.log.error("Invalid regular expression for rule %r. %s", name, e)
                     if '#' in r:
                         self.log.error("Make sure '#' in rule %r is escaped with '\\#'", name)
@@ -675,6 +1704,22 @@ class LexerReflect(object):
         for module in self.modules:
             self.validate_module(module)
 
+    # -----------------------------------------------------------------------------
+    # validate_backtracking()
+    #
+    # Reports rules whose regex can make re backtrack excessively.  Problems are
+    # warnings, or errors when check_backtracking is 'error'.
+    # -----------------------------------------------------------------------------
+
+    def validate_backtracking(self, name, regex, where):
+        for severity, description in _backtracking_risks(regex, self.reflags):
+            msg = '%sRule %r may take %s time on some inputs (%s)'
+            if self.check_backtracking == 'error':
+                self.log.error(msg, where, name, severity, description)
+                self.error = True
+            else:
+                self.log.warning(msg, where, name, severity, description)
+
     # -----------------------------------------------------------------------------
     # validate_module()
     #
@@ -709,20 +1754,99 @@ class LexerReflect(object):
                     self.error = True
             linen += 1
 
+# -----------------------------------------------------------------------------
+# BackgroundLexer
+#
+# Returned by lex(background=True).  The master regular expressions are
+# compiled on a worker thread while the caller continues.  Any attribute access
+# (such as input() or token()) waits for the build to finish and is then
+# forwarded to the lexer.  If the build fails, the exception is raised in the
+# waiting thread instead.
+# -----------------------------------------------------------------------------
+
+class BackgroundLexer(object):
+    def __init__(self, build):
+        self._lexer = None
+        self._error = None
+        self._ready = threading.Event()
+        self.build_time = None         # Seconds taken to build (None until done)
+        self._thread = threading.Thread(target=self._run, args=(build,), daemon=True)
+        self._thread.start()
+
+    def _run(self, build):
+        start = time.perf_counter()
+        try:
+            self._lexer = build()
+        except BaseException as e:
+            self._error = e
+        self.build_time = time.perf_counter() - start
+        self._ready.set()
+
+    # Return True if the build has finished (successfully or not)
+    def done(self):
+        return self._ready.is_set()
+
+    # Wait for the build to finish and return the lexer
+    def wait(self, timeout=None):
+        if not self._ready.wait(timeout):
+            raise TimeoutError('Lexer is still being built')
+        if self._error:
+            raise self._error
+        return self._lexer
+
+    def __getattr__(self, name):
+        return getattr(self.wait(), name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_') or name == 'build_time':
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.wait(), name, value)
+
+    def __iter__(self):
+        return iter(self.wait())
+
+# -----------------------------------------------------------------------------
+# Lexer cache
+#
+# Lexers built for classes are cached by class, and by signature and options
+# within a class (see lex()).  The cache holds templates that refer to the rule
+# methods by name only, so it keeps neither the first object nor, through the
+# weak keys, the class alive.
+# -----------------------------------------------------------------------------
+
+_lexer_cache = weakref.WeakKeyDictionary()
+
+def _lexer_template(lexobj):
+    template = lexobj.clone()
+    template.lexstatere = {state: _unbind_master_re(ritem)
+                           for state, ritem in lexobj.lexstatere.items()}
+    template.lexstateerrorf = {state: f and _rule_name(f)
+                               for state, f in lexobj.lexstateerrorf.items()}
+    template.lexstateeoff = {state: f and _rule_name(f)
+                             for state, f in lexobj.lexstateeoff.items()}
+    template.lexstaterecords = {}
+    template.lexre = template.lexerrorf = template.lexeoff = None
+    template.lexmodule = None
+    return template
+
+# Forget all lexers cached for classes
+def clear_cache():
+    _lexer_cache.clear()
+
 # -----------------------------------------------------------------------------
 # lex(module)
 #
 # Build all of the regular expression rules from definitions in the supplied module
 # -----------------------------------------------------------------------------
 def lex(*, module=None, object=None, debug=False, 
-        reflags=int(re.VERBOSE), debuglog=None, errorlog=None):
+        reflags=int(re.VERBOSE), debuglog=None, errorlog=None, background=False,
+        cache=True, dfa=False, check_backtracking=False, backend=None):
 
     global lexer
+    global token, input
 
     ldict = None
-    stateinfo  = {'INITIAL': 'inclusive'}
-    lexobj = Lexer()
-    global token, input
 
     if errorlog is None:
         errorlog = PlyLogger(sys.stderr)
@@ -736,7 +1860,9 @@ def lex(*, module=None, object=None, debug=False,
         module = object
 
     # Get the module dictionary used for the parser
-    if module:
+    if isinstance(module, dict):
+        ldict = dict(module)
+    elif module:
         _items = [(k, getattr(module, k)) for k in dir(module)]
         ldict = dict(_items)
         # If no __file__ attribute is available, try to obtain it from the __module__ instead
@@ -745,9 +1871,50 @@ def lex(*, module=None, object=None, debug=False,
     else:
         ldict = get_caller_module_dict(2)
 
+    options = dict(debug=debug, reflags=reflags, debuglog=debuglog, errorlog=errorlog,
+                   dfa=dfa, check_backtracking=check_backtracking, backend=backend)
+
+    # Build the lexer on a worker thread.  The module dictionary has already
+    # been collected above since the caller's frame is not available there.
+    # The worker leaves the global lexer, token() and input() alone; they
+    # refer to the proxy.
+    if background:
+        proxy = BackgroundLexer(lambda: _lex(ldict, ldict, cache=False, **options))
+        token = lambda: proxy.token()
+        input = lambda data: proxy.input(data)
+        lexer = proxy
+        return proxy
+
+    # Create global versions of the token() and input() functions
+    lexobj = _lex(module, ldict, cache=cache, **options)
+    token = lexobj.token
+    input = lexobj.input
+    lexer = lexobj
+    return lexobj
+
+# Build a lexer from the dictionary collected by lex()
+def _lex(module, ldict, *, debug, reflags, debuglog, errorlog, dfa, check_backtracking,
+         backend, cache):
+    stateinfo  = {'INITIAL': 'inclusive'}
+    lexobj = Lexer()
+
     # Collect parser information from the dictionary
-    linfo = LexerReflect(ldict, log=errorlog, reflags=reflags)
+    backend = _get_backend(backend)
+    linfo = LexerReflect(ldict, log=errorlog, reflags=reflags,
+                         check_backtracking=check_backtracking, backend=backend)
     linfo.get_all()
+
+    # A lexer defined by a class (or an instance of it) is only built once.  Later
+    # requests for the same class and rules get a clone bound to the new object.
+    cachekey = None
+    if (cache and not debug and module and not linfo.error and
+        not isinstance(module, (types.ModuleType, dict))):
+        cls = module if inspect.isclass(module) else type(module)
+        cachekey = (linfo.signature(), dfa, check_backtracking, backend)
+        cached = _lexer_cache.get(cls, {}).get(cachekey)
+        if cached:
+            return cached.clone(module)
+
     if linfo.validate_all():
         raise SyntaxError("Can't build lexer")
 
@@ -784,11 +1951,16 @@ def lex(*, module=None, object=None, debug=False,
             if debug:
                 debuglog.info("lex: Adding rule %s -> '%s' (state '%s')", fname, _get_regex(f), state)
 
-        # Now add all of the simple rules
+        # Now add all of the simple rules.  Keywords and other literal rules
+        # are merged into tries unless a DFA is built, which needs each rule
+        # as a separate group, or another regex engine is used.
         for name, r in linfo.strsym[state]:
-            regex_list.append('(?P<%s>%s)' % (name, r))
             if debug:
                 debuglog.info("lex: Adding rule %s -> '%s' (state '%s')", name, r, state)
+        if dfa or backend is not re:
+            regex_list.extend('(?P<%s>%s)' % (name, r) for name, r in linfo.strsym[state])
+        else:
+            regex_list.extend(_merge_literal_rules(linfo.strsym[state], reflags))
 
         regexs[state] = regex_list
 
@@ -798,11 +1970,12 @@ def lex(*, module=None, object=None, debug=False,
         debuglog.info('lex: ==== MASTER REGEXS FOLLOW ====')
 
     for state in regexs:
-        lexre, re_text, re_names = _form_master_re(regexs[state], reflags, ldict, linfo.toknames)
+        lexre, re_text, re_names = _form_master_re(regexs[state], reflags, ldict, linfo.toknames, backend)
         lexobj.lexstatere[state] = lexre
         lexobj.lexstateretext[state] = re_text
         lexobj.lexstaterenames[state] = re_names
         if debug:
+            debuglog.info("lex: state '%s' : %d master regex segment(s)", state, len(re_text))
             for i, text in enumerate(re_text):
                 debuglog.info("lex: state '%s' : regex[%d] = '%s'", state, i, text)
 
@@ -813,6 +1986,22 @@ def lex(*, module=None, object=None, debug=False,
             lexobj.lexstateretext[state].extend(lexobj.lexstateretext['INITIAL'])
             lexobj.lexstaterenames[state].extend(lexobj.lexstaterenames['INITIAL'])
 
+    # The compiled tables are never modified once built.  Clones share them.
+    for state in regexs:
+        lexobj.lexstatere[state] = tuple(lexobj.lexstatere[state])
+
+    # Optionally replace the master regular expressions by DFAs
+    if dfa:
+        for state in regexs:
+            lexobj.lexstatere[state], reason = _form_dfa(lexobj.lexstatere[state])
+            if not debug:
+                continue
+            if reason:
+                debuglog.info("lex: state '%s' : not using a DFA (%s)", state, reason)
+            elif lexobj.lexstatere[state]:
+                debuglog.info("lex: state '%s' : DFA with %d states", state,
+                              lexobj.lexstatere[state][0][0].nstates)
+
     lexobj.lexstateinfo = stateinfo
     lexobj.lexre = lexobj.lexstatere['INITIAL']
     lexobj.lexretext = lexobj.lexstateretext['INITIAL']
@@ -845,13 +2034,141 @@ def lex(*, module=None, object=None, debug=False,
             if s not in linfo.ignore:
                 linfo.ignore[s] = linfo.ignore.get('INITIAL', '')
 
-    # Create global versions of the token() and input() functions
-    token = lexobj.token
-    input = lexobj.input
-    lexer = lexobj
+    if cachekey:
+        _lexer_cache.setdefault(cls, {})[cachekey] = _lexer_template(lexobj)
 
     return lexobj
 
+# -----------------------------------------------------------------------------
+# lex_parallel()
+#
+# Lexes a large input in a pool of worker processes.  The input is cut into
+# chunks just after matches of the sync regular expression and each chunk is
+# lexed by a clone of the lexer, starting in the INITIAL state.  Workers see the
+# whole input, so tokens keep their absolute lexpos and a token may run past the
+# end of its chunk.  Line numbers are counted from 1 in each chunk and shifted
+# once the line counts of the chunks before it are known.
+#
+# A chunk result is only used if lexing stopped exactly at both ends of the
+# chunk in the INITIAL state with an empty state stack.  Otherwise a boundary
+# fell inside a token or inside a state such as a comment, and lexing continues
+# in this process from the start of the chunk until the next boundary that the
+# serial lexer passes cleanly.  The result is the same list of tokens that
+# reading the lexer after input(data) would give, without the lexer attribute
+# that error and eof tokens normally carry.
+#
+# Workers run the token rules, possibly on text whose tokens are thrown away.
+# They never run the error and eof rules.  A chunk with an illegal character or
+# a rule that raises an exception is rejected and lexed in this process, where
+# the error rules run as they would when lexing serially.
+# -----------------------------------------------------------------------------
+
+_parallel_lexer = None
+
+def _lex_parallel_init(lexer, data):
+    global _parallel_lexer
+    _parallel_lexer = lexer.clone()
+    _parallel_lexer.lexstateerrorf = {}
+    _parallel_lexer.lexstateeoff = {}
+    _parallel_lexer.lexstaterecords = {}
+    _parallel_lexer.input(data)
+
+# Lex data[start:end] starting from the given line number and states.  Matches
+# may extend past end.  Returns the tokens and the position reached.
+def _lex_range(lexer, start, end, lineno, state, stack):
+    lexer.lexpos = start
+    lexer.lexlen = end
+    lexer.lineno = lineno
+    lexer.lexstatestack = list(stack)
+    lexer.begin(state)
+    toks = []
+    while lexer.lexpos < end:
+        tok = lexer.token()
+        if tok is None:
+            # token() steps one past the end of the input when it runs out
+            lexer.lexpos -= 1
+            break
+        if hasattr(tok, 'lexer'):
+            del tok.lexer
+        toks.append(tok)
+    return toks, lexer.lexpos
+
+# Returns None if the chunk has to be lexed by the calling process
+def _lex_parallel_chunk(start, end):
+    lexer = _parallel_lexer
+    try:
+        toks, pos = _lex_range(lexer, start, end, 1, 'INITIAL', ())
+    except Exception:
+        return None
+    return toks, pos, lexer.lineno, lexer.lexstate, tuple(lexer.lexstatestack)
+
+def lex_parallel(lexer, data, workers=None, sync=r'\n+', chunksize=None):
+    import concurrent.futures
+    import multiprocessing
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(len(data) // (workers * 4), 1 << 16)
+    if isinstance(sync, str):
+        sync = re.compile(sync)
+
+    # Chunk boundaries go just after a match of sync
+    bounds = [0]
+    while bounds[-1] + chunksize < len(data):
+        m = sync.search(data, bounds[-1] + chunksize)
+        if not m or m.end() >= len(data):
+            break
+        bounds.append(m.end())
+    bounds.append(len(data))
+    chunks = list(zip(bounds, bounds[1:]))
+
+    local = lexer.clone()
+    local.input(data)
+    pos, lineno = 0, lexer.lineno
+    state, stack = lexer.lexstate, tuple(lexer.lexstatestack)
+    if len(chunks) == 1 or workers < 2:
+        return _lex_range(local, 0, len(data), lineno, state, stack)[0]
+
+    # Forked workers inherit the lexer and the input without pickling them
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = None
+
+    # The last chunk is lexed here if reaching the end of the input runs a rule
+    haseof = any(lexer.lexstateeoff.values())
+
+    tokens = []
+    with concurrent.futures.ProcessPoolExecutor(workers, mp_context=context,
+                                                initializer=_lex_parallel_init,
+                                                initargs=(local, data)) as pool:
+        results = pool.map(_lex_parallel_chunk, *zip(*chunks))
+        for (start, end), result in zip(chunks, results):
+            last = end == len(data)
+            if result and pos == start and state == 'INITIAL' and not stack:
+                toks, endpos, nlines, endstate, endstack = result
+                if last:
+                    usable = not haseof
+                else:
+                    usable = endpos == end and endstate == 'INITIAL' and not endstack
+                if usable:
+                    for tok in toks:
+                        tok.lineno += lineno - 1
+                    tokens.extend(toks)
+                    pos, state, stack = endpos, endstate, endstack
+                    lineno += nlines - 1
+                    continue
+
+            # Lex the chunk here instead, so that anything the rules keep on
+            # the lexer carries over into the chunks that follow
+            local.lexstateeoff = lexer.lexstateeoff if last else {}
+            local.lexstaterecords = {}
+            toks, pos = _lex_range(local, pos, end, lineno, state, stack)
+            lineno, state, stack = local.lineno, local.lexstate, tuple(local.lexstatestack)
+            tokens.extend(toks)
+    return tokens
+
 # -----------------------------------------------------------------------------
 # runmain()
 #
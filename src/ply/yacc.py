@@ -65,6 +65,13 @@ import re
 import types
 import sys
 import inspect
+import copy
+import collections
+import hashlib
+import threading
+import time
+import weakref
+from array import array
 
 #-----------------------------------------------------------------------------
 #                     === User configurable parameters ===
@@ -81,6 +88,9 @@ resultlimit = 40               # Size limit of results when running in debug mod
 
 MAXINT = sys.maxsize
 
+# Marker for a missing entry in the action table
+_missing = object()
+
 # This object is a stand-in for a logging object created by the
 # logging module.   PLY will use this by default to create things
 # such as the parser.out file.  If a user wants more detailed
@@ -160,6 +170,17 @@ class YaccSymbol:
     def __repr__(self):
         return str(self)
 
+# Returns a grammar symbol without the reference to the lexer that tokens
+# passed to p_error() are given, so that parser snapshots can be pickled.
+def _plain_symbol(sym):
+    if sym.type == 'error' and hasattr(sym.value, 'lexer'):
+        sym = copy.copy(sym)
+        sym.value = _plain_symbol(sym.value)
+    if hasattr(sym, 'lexer'):
+        sym = copy.copy(sym)
+        del sym.lexer
+    return sym
+
 # This class is a wrapper around the objects actually passed to each
 # grammar rule.   Index lookup and assignment actually assign the
 # .value attribute of the underlying YaccSymbol object.
@@ -229,9 +250,14 @@ class LRParser:
         self.productions = lrtab.lr_productions
         self.action = lrtab.lr_action
         self.goto = lrtab.lr_goto
+        self.defaults = lrtab.lr_default
+        self.starts = lrtab.lr_starts
+        self.startsym = None
         self.errorfunc = errorf
         self.set_defaulted_states()
         self.errorok = True
+        self.checkpoints = []
+        self.signature = None          # Grammar signature (set by yacc())
 
     def errok(self):
         self.errorok = True
@@ -243,6 +269,9 @@ class LRParser:
         sym.type = '$end'
         self.symstack.append(sym)
         self.statestack.append(0)
+        if self.startsym:
+            self.symstack.append(self.startsym)
+            self.statestack.append(self.action[0][self.startsym.type])
 
     # Defaulted state support.
     # This method identifies parser states where there is only one possible reduction action.
@@ -252,25 +281,84 @@ class LRParser:
     # each other or change states (i.e., manipulation of scope, lexer states, etc.).
     #
     # See:  http://www.gnu.org/software/bison/manual/html_node/Default-Reductions.html#Default-Reductions
+    #
+    # If the action table has been compressed with default reductions, a state only
+    # does one thing if every entry left in its row (including an 'error' entry) is
+    # its default reduction.  Other entries may still differ from the default.
     def set_defaulted_states(self):
         self.defaulted_states = {}
         for state, actions in self.action.items():
             rules = list(actions.values())
-            if len(rules) == 1 and rules[0] < 0:
+            if state in self.defaults:
+                default = self.defaults[state]
+                if all(r == default for r in rules):
+                    self.defaulted_states[state] = default
+            elif len(rules) == 1 and rules[0] is not None and rules[0] < 0:
                 self.defaulted_states[state] = rules[0]
 
     def disable_defaulted_states(self):
         self.defaulted_states = {}
 
+    # snapshot().
+    #
+    # Returns the state of the parse in progress as a tuple of plain values that can
+    # be pickled, as long as the values of the grammar symbols can.  It must be
+    # called while parse() waits for the next token, which is from inside the token()
+    # method of the lexer.  There is no lookahead at that point.  The position of the
+    # lexer is included, but not its input.  Passing the tuple to parse() as resume,
+    # on this parser or on a new one built from the same grammar, continues the parse.
+
+    def snapshot(self):
+        lexdata, lexpos, lineno, state, stack, pending = self.lexer.snapshot()
+        return (self.start, tuple(self.statestack), tuple(_plain_symbol(s) for s in self.symstack),
+                self.errorcount, self.errorok,
+                lexpos, lineno, state, stack, tuple(_plain_symbol(t) for t in pending))
+
+    # reparse().
+    #
+    # Parses the input again after an edit, reusing the work done before the edit.
+    # The previous parse must have been made with checkpoint set.  The text
+    # lexdata[offset:offset+removed] of its lexer is replaced by text and parsing
+    # resumes from the last checkpoint taken before the line holding the edit.
+    # Values computed before that point are reused, so rule functions must not
+    # change the values of their right hand side symbols in place.
+
+    def reparse(self, offset, removed, text, debug=False, tracking=False):
+        if not self.checkpoints:
+            raise YaccError('reparse() needs a previous parse with checkpoints')
+        lexer = self.lexer
+        data = lexer.lexdata
+        if offset < 0 or removed < 0 or offset + removed > len(data):
+            raise ValueError('Edit of %d characters at %d is outside the input' % (removed, offset))
+        newdata = data[:offset] + text + data[offset + removed:]
+
+        # Tokens before the line holding the edit are not changed by it
+        linestart = data.rfind('\n', 0, offset) + 1
+        n = len(self.checkpoints) - 1
+        while n and (self.checkpoints[n][0][1] >= linestart or self.checkpoints[n][0][5]):
+            n -= 1
+        kept = self.checkpoints[:n]
+        snap, statestack, symstack, start = self.checkpoints[n]
+        resume = (start, statestack, symstack, 0, True) + snap[1:]
+        result = self.parse(newdata, lexer=lexer, debug=debug, tracking=tracking,
+                            checkpoint=self.checkpoint, resume=resume)
+        self.checkpoints[:0] = kept
+        return result
+
     # parse().
     #
     # This is the core parsing engine.  To operate, it requires a lexer object.
     # Two options are provided.  The debug flag turns on debugging so that you can
     # see the various rule reductions and parsing steps.  tracking turns on position
     # tracking.  In this mode, symbols will record the starting/ending line number and
-    # character index.
-
-    def parse(self, input=None, lexer=None, debug=False, tracking=False):
+    # character index.  If the grammar has several start symbols, start selects the
+    # one to use (the first one by default).  If checkpoint is set, the parser state
+    # and lexer position are saved every checkpoint tokens for use by reparse().
+    # resume continues a parse from a tuple returned by snapshot(), with the lexer
+    # moved to the position recorded in it.
+
+    def parse(self, input=None, lexer=None, debug=False, tracking=False, start=None,
+              checkpoint=0, resume=None):
         # If debugging has been specified as a flag, turn it into a logging object
         if isinstance(debug, int) and debug:
             debug = PlyLogger(sys.stderr)
@@ -281,6 +369,8 @@ class LRParser:
         goto    = self.goto                      # Local reference to goto table (to avoid lookup on self.)
         prod    = self.productions               # Local reference to production list (to avoid lookup on self.)
         defaulted_states = self.defaulted_states # Local reference to defaulted states
+        defaults = self.defaults                 # Local reference to default reductions
+        missing = _missing                       # Local reference to missing entry marker
         pslice  = YaccProduction(None)           # Production object passed to grammar rules
         errorcount = 0                           # Used during error recovery
 
@@ -302,6 +392,7 @@ class LRParser:
 
         # Set the token function
         get_token = self.token = lexer.token
+        self.lexer = lexer
 
         # Set up the state and symbol stacks
         statestack = self.statestack = []   # Stack of parsing states
@@ -316,6 +407,48 @@ class LRParser:
         sym.type = '$end'
         symstack.append(sym)
         state = 0
+
+        # Select the start symbol.  With several start symbols, this is done by
+        # shifting the marker terminal of the requested one.
+        if resume:
+            start = resume[0]
+        if start is None:
+            start = next(iter(self.starts))
+        if start not in self.starts:
+            raise YaccError('Unknown start symbol %r' % start)
+        marker = self.starts[start]
+        if marker:
+            sym = self.startsym = YaccSymbol()
+            sym.type = marker
+            sym.value = None
+            state = actions[0][marker]
+            statestack.append(state)
+            symstack.append(sym)
+        else:
+            self.startsym = None
+        bottom = len(statestack)
+        self.start = start
+
+        # Continue from a snapshot.  Grammar symbols are copied, so that the
+        # snapshot can be resumed again.
+        if resume:
+            (_, states, symbols, errorcount, self.errorok,
+             lexpos, lineno, lexstate, lexstack, pending) = resume
+            statestack[:] = states
+            symstack[:] = [copy.copy(s) for s in symbols]
+            state = statestack[-1]
+            if marker:
+                self.startsym = symstack[1]
+            lexer.restore((lexer.lexdata, lexpos, lineno, lexstate, lexstack,
+                           [copy.copy(t) for t in pending]))
+        self.errorcount = errorcount
+
+        # Checkpoints are taken just before reading a token, every checkpoint
+        # tokens, unless the parser is recovering from an error
+        self.checkpoint = checkpoint
+        checkpoints = self.checkpoints = []
+        countdown = 1 if checkpoint else 0
+
         while True:
             # Get the next symbol on the input.  If a lookahead symbol
             # is already set, we just use that. Otherwise, we'll pull
@@ -327,6 +460,13 @@ class LRParser:
             if state not in defaulted_states:
                 if not lookahead:
                     if not lookaheadstack:
+                        if countdown:
+                            countdown -= 1
+                            if not countdown:
+                                countdown = checkpoint
+                                if not errorcount:
+                                    checkpoints.append((lexer.snapshot(), tuple(statestack),
+                                                        tuple(symstack), start))
                         lookahead = get_token()     # Get the next token
                     else:
                         lookahead = lookaheadstack.pop()
@@ -334,9 +474,12 @@ class LRParser:
                         lookahead = YaccSymbol()
                         lookahead.type = '$end'
 
-                # Check the action table
+                # Check the action table.  If there is no entry, use the default
+                # reduction of the state (never used for error recovery)
                 ltype = lookahead.type
-                t = actions[state].get(ltype)
+                t = actions[state].get(ltype, missing)
+                if t is missing:
+                    t = defaults.get(state) if ltype != 'error' else None
             else:
                 t = defaulted_states[state]
                 if debug:
@@ -361,6 +504,7 @@ class LRParser:
                     # Decrease error count on successful shift
                     if errorcount:
                         errorcount -= 1
+                        self.errorcount = errorcount
                     continue
 
                 if t < 0:
@@ -406,7 +550,13 @@ class LRParser:
                             # Call the grammar rule with our special slice object
                             del symstack[-plen:]
                             self.state = state
-                            p.callable(pslice)
+                            if p.positional:
+                                if p.positional == 'p':
+                                    sym.value = p.callable(*[_s.value for _s in targ[1:]], p=pslice)
+                                else:
+                                    sym.value = p.callable(*[_s.value for _s in targ[1:]])
+                            else:
+                                p.callable(pslice)
                             del statestack[-plen:]
                             if debug:
                                 debug.info('Result : %s', format_result(pslice[0]))
@@ -422,7 +572,7 @@ class LRParser:
                             sym.type = 'error'
                             sym.value = 'error'
                             lookahead = sym
-                            errorcount = error_count
+                            errorcount = self.errorcount = error_count
                             self.errorok = False
 
                         continue
@@ -445,7 +595,13 @@ class LRParser:
                         try:
                             # Call the grammar rule with our special slice object
                             self.state = state
-                            p.callable(pslice)
+                            if p.positional:
+                                if p.positional == 'p':
+                                    sym.value = p.callable(p=pslice)
+                                else:
+                                    sym.value = p.callable()
+                            else:
+                                p.callable(pslice)
                             if debug:
                                 debug.info('Result : %s', format_result(pslice[0]))
                             symstack.append(sym)
@@ -459,7 +615,7 @@ class LRParser:
                             sym.type = 'error'
                             sym.value = 'error'
                             lookahead = sym
-                            errorcount = error_count
+                            errorcount = self.errorcount = error_count
                             self.errorok = False
 
                         continue
@@ -491,7 +647,7 @@ class LRParser:
                 # first syntax error.  This function is only called if
                 # errorcount == 0.
                 if errorcount == 0 or self.errorok:
-                    errorcount = error_count
+                    errorcount = self.errorcount = error_count
                     self.errorok = False
                     errtoken = lookahead
                     if errtoken.type == '$end':
@@ -523,16 +679,16 @@ class LRParser:
                             return
 
                 else:
-                    errorcount = error_count
+                    errorcount = self.errorcount = error_count
 
                 # case 1:  the statestack only has 1 entry on it.  If we're in this state, the
                 # entire parse has been rolled back and we're completely hosed.   The token is
                 # discarded and we just keep going.
 
-                if len(statestack) <= 1 and lookahead.type != '$end':
+                if len(statestack) <= bottom and lookahead.type != '$end':
                     lookahead = None
                     errtoken = None
-                    state = 0
+                    state = statestack[-1]
                     # Nuke the pushback stack
                     del lookaheadstack[:]
                     continue
@@ -607,24 +763,30 @@ _is_identifier = re.compile(r'^[a-zA-Z0-9_-]+$')
 #       func     - Function that executes on reduce
 #       file     - File where production function is defined
 #       lineno   - Line number where production function is defined
+#       positional - Calling convention of func (see @positional)
 #
 # The following attributes are defined or optional.
 #
 #       len       - Length of the production (number of symbols on right hand side)
 #       usyms     - Set of unique symbols found in the production
+#       reduced   - Number of times the production is reduced in the tables
 # -----------------------------------------------------------------------------
 
 class Production(object):
-    reduced = 0
+    __slots__ = ('name', 'prod', 'number', 'func', 'callable', 'positional', 'file', 'line',
+                 'prec', 'len', 'usyms', 'lr_items', 'lr_next', 'str', 'reduced')
+
     def __init__(self, number, name, prod, precedence=('right', 0), func=None, file='', line=0):
         self.name     = name
         self.prod     = tuple(prod)
         self.number   = number
         self.func     = func
         self.callable = None
+        self.positional = False
         self.file     = file
         self.line     = line
         self.prec     = precedence
+        self.reduced  = 0
 
         # Internal settings used during table construction
 
@@ -681,6 +843,41 @@ class Production(object):
     def bind(self, pdict):
         if self.func:
             self.callable = pdict[self.func]
+            self.positional = getattr(self.callable, 'positional', False)
+
+# -----------------------------------------------------------------------------
+# class MiniProduction
+#
+# A stripped-down version of Production holding only the information needed
+# by the parsing engine.  Used in place of Production once the parsing tables
+# have been built (see yacc(runtime_only=True)) so that the data structures
+# needed only during table construction can be garbage collected.
+# -----------------------------------------------------------------------------
+
+class MiniProduction(object):
+    __slots__ = ('name', 'len', 'func', 'callable', 'positional', 'file', 'line', 'str')
+
+    def __init__(self, str, name, len, func, file, line):
+        self.name     = name
+        self.len      = len
+        self.func     = func
+        self.callable = None
+        self.positional = False
+        self.file     = file
+        self.line     = line
+        self.str      = str
+
+    def __str__(self):
+        return self.str
+
+    def __repr__(self):
+        return 'MiniProduction(%s)' % self.str
+
+    # Bind the production function name to a callable
+    def bind(self, pdict):
+        if self.func:
+            self.callable = pdict[self.func]
+            self.positional = getattr(self.callable, 'positional', False)
 
 # -----------------------------------------------------------------------------
 # class LRItem
@@ -694,29 +891,42 @@ class Production(object):
 # basic attributes:
 #
 #       name       - Name of the production.  For example 'expr'
-#       prod       - A list of symbols on the right side ['expr','.', 'PLUS','term']
+#       prod       - A tuple of symbols on the right side ('expr','.', 'PLUS','term').
+#                    Computed on demand from rhs.
+#       rhs        - The right hand side of the production ('expr', 'PLUS', 'term')
 #       number     - Production number.
+#       itemno     - Unique number of the item in the grammar (see build_lritems)
 #
 #       lr_next      Next LR item. Example, if we are ' expr -> expr . PLUS term'
 #                    then lr_next refers to 'expr -> expr PLUS . term'
 #       lr_index   - LR item index (location of the ".") in the prod list.
-#       lookaheads - LALR lookahead symbols for this item
-#       len        - Length of the production (number of symbols on right hand side)
+#       lookaheads - LALR lookahead symbols for this item (None until assigned)
+#       len        - Length of prod (number of symbols on right hand side plus one)
 #       lr_after    - List of all productions that immediately follow
 #       lr_before   - Grammar symbol immediately before
+#       lr_symbol   - Grammar symbol immediately after (None at the end)
 # -----------------------------------------------------------------------------
 
 class LRItem(object):
+    __slots__ = ('name', 'rhs', 'number', 'itemno', 'lr_index', 'lookaheads', 'len', 'usyms',
+                 'lr_next', 'lr_after', 'lr_before', 'lr_symbol')
+
     def __init__(self, p, n):
         self.name       = p.name
-        self.prod       = list(p.prod)
+        self.rhs        = p.prod
         self.number     = p.number
+        self.itemno     = -1
         self.lr_index   = n
-        self.lookaheads = {}
-        self.prod.insert(n, '.')
-        self.prod       = tuple(self.prod)
-        self.len        = len(self.prod)
+        self.lookaheads = None
+        self.len        = p.len + 1
         self.usyms      = p.usyms
+        self.lr_next    = None
+        self.lr_symbol  = p.prod[n] if n < p.len else None
+
+    @property
+    def prod(self):
+        n = self.lr_index
+        return self.rhs[:n] + ('.',) + self.rhs[n:]
 
     def __str__(self):
         if self.prod:
@@ -788,6 +998,8 @@ class Grammar(object):
 
         self.Start = None           # Starting symbol for the grammar
 
+        self.Starts = {}            # Start symbols mapped to the marker terminals selecting
+                                    # them (None if there is only one start symbol)
 
     def __len__(self):
         return len(self.Productions)
@@ -910,9 +1122,32 @@ class Grammar(object):
     #
     # Sets the starting symbol and creates the augmented grammar.  Production
     # rule 0 is S' -> start where start is the start symbol.
+    #
+    # If a list of start symbols is given, there is a production S' -> $start_X X
+    # for each start symbol X instead.  The first one is rule 0, the others are
+    # added after the rules of the grammar.  $start_X is a marker terminal that
+    # the parser shifts first to select the start symbol X.
     # -----------------------------------------------------------------------------
 
     def set_start(self, start=None):
+        if isinstance(start, (list, tuple)):
+            for s in start:
+                if s not in self.Nonterminals:
+                    raise GrammarError('start symbol %s undefined' % s)
+            for n, s in enumerate(start):
+                marker = '$start_%s' % s
+                number = n and len(self.Productions)
+                p = Production(number, "S'", [marker, s])
+                if number:
+                    self.Productions.append(p)
+                else:
+                    self.Productions[0] = p
+                self.Terminals[marker] = [number]
+                self.Nonterminals[s].append(number)
+                self.Starts[s] = marker
+            self.Start = start[0]
+            return
+
         if not start:
             start = self.Productions[1].name
         if start not in self.Nonterminals:
@@ -920,6 +1155,11 @@ class Grammar(object):
         self.Productions[0] = Production(0, "S'", [start])
         self.Nonterminals[start].append(0)
         self.Start = start
+        self.Starts = {start: None}
+
+    # Return the initial LR items of the augmented grammar
+    def start_items(self):
+        return [p.lr_next for p in self.Productions if p.name == "S'"]
 
     # -----------------------------------------------------------------------------
     # find_unreachable()
@@ -940,7 +1180,8 @@ class Grammar(object):
                     mark_reachable_from(r)
 
         reachable = set()
-        mark_reachable_from(self.Productions[0].prod[0])
+        for s in self.Starts:
+            mark_reachable_from(s)
         return [s for s in self.Nonterminals if s not in reachable]
 
     # -----------------------------------------------------------------------------
@@ -1169,6 +1410,9 @@ class Grammar(object):
             start = self.Productions[1].name
 
         self.Follow[start] = ['$end']
+        self.Follow["S'"] = ['$end']
+        for s in self.Starts:
+            self.Follow[s] = ['$end']
 
         while True:
             didadd = False
@@ -1212,6 +1456,7 @@ class Grammar(object):
     # -----------------------------------------------------------------------------
 
     def build_lritems(self):
+        itemno = 0
         for p in self.Productions:
             lastlri = p
             i = 0
@@ -1221,15 +1466,11 @@ class Grammar(object):
                     lri = None
                 else:
                     lri = LRItem(p, i)
+                    lri.itemno = itemno
+                    itemno += 1
                     # Precompute the list of productions immediately following
-                    try:
-                        lri.lr_after = self.Prodnames[lri.prod[i+1]]
-                    except (IndexError, KeyError):
-                        lri.lr_after = []
-                    try:
-                        lri.lr_before = lri.prod[i-1]
-                    except IndexError:
-                        lri.lr_before = None
+                    lri.lr_after = self.Prodnames.get(lri.lr_symbol, [])
+                    lri.lr_before = p.prod[i-1] if i > 0 else None
 
                 lastlri.lr_next = lri
                 if not lri:
@@ -1300,6 +1541,197 @@ def traverse(x, N, stack, F, X, R, FP):
 class LALRError(YaccError):
     pass
 
+# -----------------------------------------------------------------------------
+# is_identity_action()
+#
+# Returns True if a grammar rule function does nothing but pass the value of
+# its only right-hand-side symbol through (i.e., p[0] = p[1]).  The check is
+# made by comparing compiled code against reference functions.
+# -----------------------------------------------------------------------------
+
+def _identity_rule(p):
+    'a : b'
+    p[0] = p[1]
+
+def _identity_method(self, p):
+    'a : b'
+    p[0] = p[1]
+
+def _identity_value(value):
+    'a : b'
+    return value
+
+def _identity_value_method(self, value):
+    'a : b'
+    return value
+
+_identity_value.positional = _identity_value_method.positional = True
+_identity_actions = (_identity_rule, _identity_method, _identity_value, _identity_value_method)
+
+def is_identity_action(func):
+    positional = getattr(func, 'positional', False)
+    code = getattr(getattr(func, '__func__', func), '__code__', None)
+    if code is None:
+        return False
+    for ref in _identity_actions:
+        refcode = ref.__code__
+        if (bool(positional) == bool(getattr(ref, 'positional', False)) and
+            code.co_code == refcode.co_code and code.co_names == refcode.co_names and
+            code.co_consts[1:] == refcode.co_consts[1:]):
+            return True
+    return False
+
+
+# -----------------------------------------------------------------------------
+#                           === Packed tables ===
+#
+# The action and goto tables are normally stored as a dictionary of
+# dictionaries.  A PackedTable stores the same information using a
+# row-displacement (comb vector) encoding.  Every symbol is given a column
+# number and identical rows are stored only once.  The remaining rows are
+# overlapped in a single vector, each at its own displacement (base), such that
+# no two rows occupy the same slot.  A parallel check vector records which row
+# owns each slot.  Looking up the entry for (state, symbol) amounts to:
+#
+#       pos = base[row] + column[symbol]
+#       if check[pos] == row: entry = value[pos]
+#
+# A PackedTable is a read-only mapping of states to row objects that provide
+# the same lookup operations as the dictionaries they replace.
+# -----------------------------------------------------------------------------
+
+_packed_none = -0x7fffffff        # Encoding of None (a nonassoc error entry)
+
+class PackedRow(object):
+    __slots__ = ('table', 'row', 'base')
+
+    def __init__(self, table, row, base):
+        self.table = table
+        self.row = row
+        self.base = base
+
+    def get(self, key, default=None):
+        table = self.table
+        col = table.columns.get(key)
+        if col is None:
+            return default
+        pos = self.base + col
+        if table.check[pos] != self.row:
+            return default
+        value = table.value[pos]
+        return None if value == _packed_none else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _missing)
+        if value is _missing:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _missing) is not _missing
+
+    def items(self):
+        table = self.table
+        check = table.check
+        value = table.value
+        for key, col in table.columns.items():
+            pos = self.base + col
+            if check[pos] == self.row:
+                v = value[pos]
+                yield key, None if v == _packed_none else v
+
+    def keys(self):
+        return [key for key, _ in self.items()]
+
+    def values(self):
+        return [value for _, value in self.items()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+class PackedTable(object):
+    def __init__(self, table):
+        # Assign column numbers to all symbols used anywhere in the table
+        self.columns = {}
+        for row in table.values():
+            for key in row:
+                if key not in self.columns:
+                    self.columns[key] = len(self.columns)
+
+        # Share identical rows
+        unique = {}
+        states = {}
+        for state, row in table.items():
+            sig = tuple(sorted((self.columns[k], _packed_none if v is None else v) for k, v in row.items()))
+            states[state] = unique.setdefault(sig, len(unique))
+
+        # Place the rows, largest first, at the lowest displacement that fits
+        bases = [0] * len(unique)
+        check = []
+        value = []
+        free = 0                  # All slots below this one are in use
+        for sig, row in sorted(unique.items(), key=lambda item: -len(item[0])):
+            if not sig:
+                continue
+            while free < len(check) and check[free] != -1:
+                free += 1
+            base = max(0, free - sig[0][0])
+            while True:
+                for col, _ in sig:
+                    pos = base + col
+                    if pos < len(check) and check[pos] != -1:
+                        break
+                else:
+                    break
+                base += 1
+            end = base + sig[-1][0] + 1
+            if end > len(check):
+                check.extend([-1] * (end - len(check)))
+                value.extend([0] * (end - len(value)))
+            for col, v in sig:
+                check[base + col] = row
+                value[base + col] = v
+            bases[row] = base
+
+        # Pad the vectors so that any column of any row can be probed
+        check.extend([-1] * len(self.columns))
+        value.extend([0] * len(self.columns))
+        self.check = array('i', check)
+        self.value = array('i', value)
+        self.nrows = len(unique)
+
+        rows = [PackedRow(self, row, bases[row]) for row in range(len(unique))]
+        self.rows = dict((state, rows[row]) for state, row in states.items())
+
+    def __getitem__(self, state):
+        return self.rows[state]
+
+    def get(self, state, default=None):
+        return self.rows.get(state, default)
+
+    def __contains__(self, state):
+        return state in self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def keys(self):
+        return self.rows.keys()
+
+    def values(self):
+        return self.rows.values()
+
+    def items(self):
+        return self.rows.items()
 
 # -----------------------------------------------------------------------------
 #                             == LRTable ==
@@ -1309,8 +1741,9 @@ class LALRError(YaccError):
 # -----------------------------------------------------------------------------
 
 class LRTable:
-    def __init__(self, grammar, log=None):
+    def __init__(self, grammar, log=None, kernel_hash=False):
         self.grammar = grammar
+        self.kernel_hash = kernel_hash
 
         # Set up the logger
         if not log:
@@ -1320,11 +1753,12 @@ class LRTable:
         # Internal attributes
         self.lr_action     = {}        # Action table
         self.lr_goto       = {}        # Goto table
+        self.lr_default    = {}        # Default reductions (state -> rule)
         self.lr_productions  = grammar.Productions    # Copy of grammar Production array
+        self.lr_starts     = grammar.Starts  # Start symbols and their marker terminals
         self.lr_goto_cache = {}        # Cache of computed gotos
         self.lr0_cidhash   = {}        # Cache of closures
-
-        self._add_count    = 0         # Internal counter used to detect cycles
+        self.lr0_trans     = []        # LR(0) transitions (state -> {symbol: state})
 
         # Diagnostic information filled in by the table generator
         self.sr_conflict   = 0
@@ -1345,24 +1779,138 @@ class LRTable:
         for p in self.lr_productions:
             p.bind(pdict)
 
+    # -----------------------------------------------------------------------------
+    # collapse_unit_productions()
+    #
+    # Eliminates chains of trivial reductions such as expr -> term -> factor.
+    # A unit production is a rule A -> B where B is a nonterminal and whose
+    # action only passes the value through (p[0] = p[1]).  If the parser enters
+    # a state in which the only possible action is to reduce such a rule, the
+    # reduction can be skipped by making the goto on B go directly to the state
+    # that the goto on A would have reached.  The only visible difference is
+    # that the symbol left on the stack keeps the type B.
+    #
+    # Must be called after bind_callables().  Returns the number of rewritten
+    # goto entries.
+    # -----------------------------------------------------------------------------
+
+    def collapse_unit_productions(self):
+        Productions = self.lr_productions
+        Nonterminals = self.grammar.Nonterminals
+
+        units = set()
+        for p in Productions[1:]:
+            if p.len == 1 and p.prod[0] in Nonterminals and is_identity_action(p.callable):
+                units.add(p.number)
+
+        # Find the states whose only action is a reduction by a unit production
+        chain = {}
+        for st, actions in self.lr_action.items():
+            rules = set(actions.values())
+            if len(rules) == 1 and not self.lr_goto.get(st):
+                r = rules.pop()
+                if r is not None and r < 0 and -r in units:
+                    chain[st] = Productions[-r].name
+
+        # Redirect every goto that leads into such a state
+        count = 0
+        for st, gotos in self.lr_goto.items():
+            for n, j in gotos.items():
+                target = j
+                visited = set()
+                while target in chain and target not in visited:
+                    visited.add(target)
+                    nxt = gotos.get(chain[target])
+                    if nxt is None:
+                        break
+                    target = nxt
+                if target != j:
+                    gotos[n] = target
+                    count += 1
+        return count
+
+    # -----------------------------------------------------------------------------
+    # set_default_reductions()
+    #
+    # Compresses the action table in the manner of bison.  For each state, the
+    # most common reduction becomes the default action of the state and its
+    # entries are removed from lr_action.  The parser performs the default
+    # reduction whenever the lookahead has no entry of its own.  As a result,
+    # some syntax errors are detected after one or more extra reductions, but
+    # never after an additional token has been shifted.  Entries for the
+    # 'error' token are always kept so that error recovery is unaffected.
+    #
+    # Returns the number of entries removed from the action table.
+    # -----------------------------------------------------------------------------
+
+    def set_default_reductions(self):
+        removed = 0
+        for st, actions in self.lr_action.items():
+            counts = {}
+            for a, r in actions.items():
+                if r is not None and r < 0 and a != 'error':
+                    counts[r] = counts.get(r, 0) + 1
+            if not counts:
+                continue
+            r = max(counts, key=counts.get)
+            self.lr_default[st] = r
+            for a in [a for a, v in actions.items() if v == r and a != 'error']:
+                del actions[a]
+            removed += counts[r]
+        return removed
+
+    # -----------------------------------------------------------------------------
+    # compress_tables()
+    #
+    # Replaces the action and goto tables by PackedTable instances.  The tables
+    # can no longer be modified afterwards.  Returns the number of distinct
+    # rows in the action and goto tables.
+    # -----------------------------------------------------------------------------
+
+    def compress_tables(self):
+        self.lr_action = PackedTable(self.lr_action)
+        self.lr_goto = PackedTable(self.lr_goto)
+        return self.lr_action.nrows, self.lr_goto.nrows
+
+    # -----------------------------------------------------------------------------
+    # release_construction_data()
+    #
+    # Replaces the productions by MiniProduction instances bound to the
+    # callables in pdict and drops all references to the grammar, the LR items
+    # and the caches used during table construction.  Only the information
+    # needed by LRParser is kept.  No other methods may be used afterwards.
+    # -----------------------------------------------------------------------------
+
+    def release_construction_data(self, pdict):
+        productions = []
+        for p in self.lr_productions:
+            mp = MiniProduction(p.str, p.name, p.len, p.func, p.file, p.line)
+            mp.bind(pdict)
+            productions.append(mp)
+        self.lr_productions = productions
+        self.grammar = None
+        self.lr_goto_cache = {}
+        self.lr0_cidhash = {}
+        self.lr0_trans = []
+        self.sr_conflicts = []
+        self.rr_conflicts = []
+        self.conflicts = []
+
     # Compute the LR(0) closure operation on I, where I is a set of LR(0) items.
 
     def lr0_closure(self, I):
-        self._add_count += 1
-
-        # Add everything in I to J
+        # Add everything in I to J.  Items appended to J while iterating over
+        # it are visited as well.  added holds the numbers of the productions
+        # whose initial item is already in J.
         J = I[:]
-        didadd = True
-        while didadd:
-            didadd = False
-            for j in J:
-                for x in j.lr_after:
-                    if getattr(x, 'lr0_added', 0) == self._add_count:
-                        continue
-                    # Add B --> .G to J
-                    J.append(x.lr_next)
-                    x.lr0_added = self._add_count
-                    didadd = True
+        added = set()
+        for j in J:
+            for x in j.lr_after:
+                if x.number in added:
+                    continue
+                # Add B --> .G to J
+                J.append(x.lr_next)
+                added.add(x.number)
 
         return J
 
@@ -1391,10 +1939,10 @@ class LRTable:
         for p in I:
             n = p.lr_next
             if n and n.lr_before == x:
-                s1 = s.get(id(n))
+                s1 = s.get(n.itemno)
                 if not s1:
                     s1 = {}
-                    s[id(n)] = s1
+                    s[n.itemno] = s1
                 gs.append(n)
                 s = s1
         g = s.get('$end')
@@ -1407,18 +1955,21 @@ class LRTable:
         self.lr_goto_cache[(id(I), x)] = g
         return g
 
-    # Compute the LR(0) sets of item function
+    # Compute the LR(0) sets of item function.  The transitions between the
+    # sets are recorded in lr0_trans.
     def lr0_items(self):
-        C = [self.lr0_closure([self.grammar.Productions[0].lr_next])]
+        C = [self.lr0_closure(self.grammar.start_items())]
         i = 0
         for I in C:
             self.lr0_cidhash[id(I)] = i
             i += 1
+        self.lr0_trans = [{}]
 
         # Loop over the items in C and each grammar symbols
         i = 0
         while i < len(C):
             I = C[i]
+            st_trans = self.lr0_trans[i]
             i += 1
 
             # Collect all of the symbols that could possibly be in the goto(I,X) sets
@@ -1429,10 +1980,55 @@ class LRTable:
 
             for x in asyms:
                 g = self.lr0_goto(I, x)
-                if not g or id(g) in self.lr0_cidhash:
+                if not g:
+                    continue
+                if id(g) not in self.lr0_cidhash:
+                    self.lr0_cidhash[id(g)] = len(C)
+                    C.append(g)
+                    self.lr0_trans.append({})
+                st_trans[x] = self.lr0_cidhash[id(g)]
+
+        return C
+
+    # Compute the LR(0) sets of items by identifying each set with its kernel,
+    # the sorted tuple of the numbers of the items it was created from.  States
+    # with the same kernel are merged, even where lr0_items() keeps them apart
+    # because their items were produced in a different order, so the tables
+    # can differ from (and have fewer states than) the ones lr0_items() builds.
+    # No goto cache or object identities are needed.  Only the kernels and the
+    # explicit transition table lr0_trans are kept.
+    def lr0_kernel_items(self):
+        start = self.grammar.start_items()
+        C = [self.lr0_closure(start)]
+        kernels = {tuple(sorted([n.itemno for n in start])): 0}
+        self.lr0_trans = [{}]
+
+        i = 0
+        while i < len(C):
+            I = C[i]
+            st_trans = self.lr0_trans[i]
+            i += 1
+
+            # Collect the symbols and the items that follow each of them
+            asyms = {}
+            after = {}
+            for ii in I:
+                for s in ii.usyms:
+                    asyms[s] = None
+                if ii.lr_symbol is not None:
+                    after.setdefault(ii.lr_symbol, []).append(ii.lr_next)
+
+            for x in asyms:
+                gs = after.get(x)
+                if not gs:
                     continue
-                self.lr0_cidhash[id(g)] = len(C)
-                C.append(g)
+                kernel = tuple(sorted([n.itemno for n in gs]))
+                j = kernels.get(kernel)
+                if j is None:
+                    j = kernels[kernel] = len(C)
+                    C.append(self.lr0_closure(gs))
+                    self.lr0_trans.append({})
+                st_trans[x] = j
 
         return C
 
@@ -1495,12 +2091,14 @@ class LRTable:
 
     def find_nonterminal_transitions(self, C):
         trans = []
+        seen = set()
         for stateno, state in enumerate(C):
             for p in state:
                 if p.lr_index < p.len - 1:
-                    t = (stateno, p.prod[p.lr_index+1])
+                    t = (stateno, p.lr_symbol)
                     if t[1] in self.grammar.Nonterminals:
-                        if t not in trans:
+                        if t not in seen:
+                            seen.add(t)
                             trans.append(t)
         return trans
 
@@ -1517,17 +2115,19 @@ class LRTable:
         state, N = trans
         terms = []
 
-        g = self.lr0_goto(C[state], N)
+        g = C[self.lr0_trans[state][N]]
         for p in g:
             if p.lr_index < p.len - 1:
-                a = p.prod[p.lr_index+1]
+                a = p.lr_symbol
                 if a in self.grammar.Terminals:
                     if a not in terms:
                         terms.append(a)
 
-        # This extra bit is to handle the start state
-        if state == 0 and N == self.grammar.Productions[0].prod[0]:
-            terms.append('$end')
+        # This extra bit is to handle the start symbols
+        for p in C[state]:
+            if p.name == "S'" and p.lr_symbol == N:
+                terms.append('$end')
+                break
 
         return terms
 
@@ -1542,11 +2142,11 @@ class LRTable:
         rel = []
         state, N = trans
 
-        g = self.lr0_goto(C[state], N)
-        j = self.lr0_cidhash.get(id(g), -1)
+        j = self.lr0_trans[state][N]
+        g = C[j]
         for p in g:
             if p.lr_index < p.len - 1:
-                a = p.prod[p.lr_index + 1]
+                a = p.lr_symbol
                 if a in empty:
                     rel.append((j, a))
 
@@ -1600,11 +2200,12 @@ class LRTable:
                 # Okay, we have a name match.  We now follow the production all the way
                 # through the state machine until we get the . on the right hand side
 
+                pprod = p.prod
                 lr_index = p.lr_index
                 j = state
                 while lr_index < p.len - 1:
                     lr_index = lr_index + 1
-                    t = p.prod[lr_index]
+                    t = pprod[lr_index]
 
                     # Check to see if this symbol and state are a non-terminal transition
                     if (j, t) in dtrans:
@@ -1614,17 +2215,16 @@ class LRTable:
 
                         li = lr_index + 1
                         while li < p.len:
-                            if p.prod[li] in self.grammar.Terminals:
+                            if pprod[li] in self.grammar.Terminals:
                                 break      # No forget it
-                            if p.prod[li] not in nullable:
+                            if pprod[li] not in nullable:
                                 break
                             li = li + 1
                         else:
                             # Appears to be a relation between (j,t) and (state,N)
                             includes.append((j, t))
 
-                    g = self.lr0_goto(C[j], t)               # Go to next set
-                    j = self.lr0_cidhash.get(id(g), -1)      # Go to next state
+                    j = self.lr0_trans[j].get(t, -1)         # Go to next state
 
                 # When we get here, j is the final state, now we have to locate the production
                 for r in C[j]:
@@ -1635,7 +2235,7 @@ class LRTable:
                     i = 0
                     # This look is comparing a production ". A B C" with "A B C ."
                     while i < r.lr_index:
-                        if r.prod[i] != p.prod[i+1]:
+                        if r.rhs[i] != pprod[i+1]:
                             break
                         i = i + 1
                     else:
@@ -1704,12 +2304,18 @@ class LRTable:
         for trans, lb in lookbacks.items():
             # Loop over productions in lookback
             for state, p in lb:
+                if p.lookaheads is None:
+                    p.lookaheads = {}
                 if state not in p.lookaheads:
                     p.lookaheads[state] = []
+                laheads = p.lookaheads[state]
                 f = followset.get(trans, [])
-                for a in f:
-                    if a not in p.lookaheads[state]:
-                        p.lookaheads[state].append(a)
+                if f:
+                    seen = set(laheads)
+                    for a in f:
+                        if a not in seen:
+                            seen.add(a)
+                            laheads.append(a)
 
     # -----------------------------------------------------------------------------
     # add_lalr_lookaheads()
@@ -1754,7 +2360,10 @@ class LRTable:
         # Step 1: Construct C = { I0, I1, ... IN}, collection of LR(0) items
         # This determines the number of states
 
-        C = self.lr0_items()
+        if self.kernel_hash:
+            C = self.lr0_kernel_items()
+        else:
+            C = self.lr0_items()
         self.add_lalr_lookaheads(C)
 
         # Build the parser table, state by state
@@ -1835,11 +2444,9 @@ class LRTable:
                                     st_actionp[a] = p
                                     Productions[p.number].reduced += 1
                     else:
-                        i = p.lr_index
-                        a = p.prod[i+1]       # Get symbol right after the "."
+                        a = p.lr_symbol       # Get symbol right after the "."
                         if a in self.grammar.Terminals:
-                            g = self.lr0_goto(I, a)
-                            j = self.lr0_cidhash.get(id(g), -1)
+                            j = self.lr0_trans[st].get(a, -1)
                             if j >= 0:
                                 # We are in a shift state
                                 actlist.append((a, p, 'shift and go to state %d' % j))
@@ -1911,8 +2518,7 @@ class LRTable:
                     if s in self.grammar.Nonterminals:
                         nkeys[s] = None
             for n in nkeys:
-                g = self.lr0_goto(I, n)
-                j = self.lr0_cidhash.get(id(g), -1)
+                j = self.lr0_trans[st].get(n, -1)
                 if j >= 0:
                     st_goto[n] = j
                     log.info('    %-30s shift and go to state %d', n, j)
@@ -1922,6 +2528,194 @@ class LRTable:
             goto[st] = st_goto
             st += 1
 
+# -----------------------------------------------------------------------------
+#                             == LazyLRTable ==
+#
+# An experimental alternative to LRTable that computes the parsing tables on
+# demand.  Since LALR(1) lookaheads can only be computed over the whole LR(0)
+# automaton, canonical LR(1) states are used instead.  Their lookaheads only
+# depend on the state they are reached from.  Each state is identified by its
+# kernel, a tuple of (item number, lookaheads) pairs.  The action and goto rows
+# of a state are computed the first time the parser looks them up.
+#
+# For grammars without conflicts the language recognized is the same as with
+# LRTable.  The state numbers differ and some syntax errors are detected before
+# reductions that LALR(1) tables would have performed.  The rows computed so
+# far can be saved with get_states() and restored with set_states().
+# -----------------------------------------------------------------------------
+
+class LazyRows(dict):
+    __slots__ = ('build',)
+
+    def __init__(self, build):
+        self.build = build
+
+    def __missing__(self, state):
+        self.build(state)
+        return dict.__getitem__(self, state)
+
+class LazyLRTable(object):
+    def __init__(self, grammar, log=None):
+        self.grammar = grammar
+
+        # Set up the logger
+        if not log:
+            log = NullLogger()
+        self.log = log
+
+        self.lr_action      = LazyRows(self.lr1_state)   # Action table
+        self.lr_goto        = LazyRows(self.lr1_state)   # Goto table
+        self.lr_default     = {}
+        self.lr_productions = grammar.Productions
+        self.lr_starts      = grammar.Starts
+        self.lr1_kernels    = []       # Kernels of the states created so far
+        self.lr1_states     = {}       # Kernel -> state number
+        self.lr1_first      = {}       # Cache of First() of the symbols after an item
+
+        # Diagnostic information about the states computed so far
+        self.sr_conflicts  = []
+        self.rr_conflicts  = []
+
+        self.grammar.build_lritems()
+        self.grammar.compute_first()
+        self.lr_items = [lri for p in grammar.Productions for lri in p.lr_items]
+
+        self.lr1_add_state(tuple(sorted([(n.itemno, ('$end',)) for n in grammar.start_items()])))
+
+    # Bind all production function names to callable objects in pdict
+    def bind_callables(self, pdict):
+        for p in self.lr_productions:
+            p.bind(pdict)
+
+    # Return the number of the state with the given kernel, creating it if needed
+    def lr1_add_state(self, kernel):
+        st = self.lr1_states.get(kernel)
+        if st is None:
+            st = self.lr1_states[kernel] = len(self.lr1_kernels)
+            self.lr1_kernels.append(kernel)
+        return st
+
+    # Compute the LR(1) closure of a kernel.  Returns a dictionary mapping
+    # LR items to sets of lookahead symbols.
+    def lr1_closure(self, kernel):
+        Prodnames = self.grammar.Prodnames
+        items = {}
+        for n, laheads in kernel:
+            items[self.lr_items[n]] = set(laheads)
+
+        todo = list(items)
+        while todo:
+            lri = todo.pop()
+            if lri.lr_symbol not in Prodnames:
+                continue
+            first = self.lr1_first.get(lri.itemno)
+            if first is None:
+                f = self.grammar._first(lri.rhs[lri.lr_index+1:])
+                first = self.lr1_first[lri.itemno] = (set(f) - {'<empty>'}, '<empty>' in f)
+            laheads = first[0] | items[lri] if first[1] else first[0]
+            for p in Prodnames[lri.lr_symbol]:
+                n = p.lr_next
+                cur = items.get(n)
+                if cur is None:
+                    items[n] = set(laheads)
+                    todo.append(n)
+                elif not laheads <= cur:
+                    cur |= laheads
+                    todo.append(n)
+        return items
+
+    # Compute the action and goto rows of a state.  Conflicts are resolved in
+    # the same way as in LRTable.lr_parse_table().
+    def lr1_state(self, st):
+        if not 0 <= st < len(self.lr1_kernels):
+            raise KeyError(st)
+        Productions = self.grammar.Productions
+        Precedence  = self.grammar.Precedence
+        items = self.lr1_closure(self.lr1_kernels[st])
+
+        # Compute the transitions
+        after = {}
+        for lri, laheads in items.items():
+            if lri.lr_symbol is not None:
+                after.setdefault(lri.lr_symbol, []).append((lri.lr_next.itemno, tuple(sorted(laheads))))
+
+        shifts = {}
+        st_goto = {}
+        for x, kernel in after.items():
+            j = self.lr1_add_state(tuple(sorted(kernel)))
+            if x in self.grammar.Terminals:
+                shifts[x] = j
+            else:
+                st_goto[x] = j
+
+        # Collect the reductions.  Among conflicting rules, the one defined first wins.
+        st_action = {}
+        reduce = {}
+        for lri, laheads in items.items():
+            if lri.lr_symbol is not None:
+                continue
+            if lri.name == "S'":
+                st_action['$end'] = 0
+                continue
+            p = Productions[lri.number]
+            for a in laheads:
+                oldp = reduce.get(a)
+                if oldp is None:
+                    reduce[a] = p
+                else:
+                    chosenp, rejectp = (p, oldp) if oldp.line > p.line else (oldp, p)
+                    reduce[a] = chosenp
+                    self.rr_conflicts.append((st, chosenp, rejectp))
+
+        for a, p in reduce.items():
+            if a in st_action:
+                continue
+            if a not in shifts:
+                st_action[a] = -p.number
+                continue
+            sprec, slevel = Precedence.get(a, ('right', 0))
+            rprec, rlevel = p.prec
+            if (slevel < rlevel) or ((slevel == rlevel) and (rprec == 'left')):
+                st_action[a] = -p.number
+                if not slevel and not rlevel:
+                    self.sr_conflicts.append((st, a, 'reduce'))
+            elif (slevel == rlevel) and (rprec == 'nonassoc'):
+                st_action[a] = None
+            else:
+                st_action[a] = shifts[a]
+                if not rlevel:
+                    self.sr_conflicts.append((st, a, 'shift'))
+
+        for a, j in shifts.items():
+            if a not in st_action:
+                st_action[a] = j
+
+        dict.__setitem__(self.lr_action, st, st_action)
+        dict.__setitem__(self.lr_goto, st, st_goto)
+        self.log.info('state %d computed (%d states known)', st, len(self.lr1_kernels))
+
+    # Return the states computed so far as plain data that can be pickled
+    def get_states(self):
+        return {
+            'productions': [p.str for p in self.lr_productions],
+            'kernels': list(self.lr1_kernels),
+            'action': dict(self.lr_action),
+            'goto': dict(self.lr_goto),
+        }
+
+    # Restore states saved by get_states()
+    def set_states(self, data):
+        if data['productions'] != [p.str for p in self.lr_productions]:
+            raise YaccError('Saved states do not match the grammar')
+        self.lr1_kernels[:] = data['kernels']
+        self.lr1_states.clear()
+        for st, kernel in enumerate(self.lr1_kernels):
+            self.lr1_states[kernel] = st
+        dict.clear(self.lr_action)
+        dict.update(self.lr_action, data['action'])
+        dict.clear(self.lr_goto)
+        dict.update(self.lr_goto, data['goto'])
+
 # -----------------------------------------------------------------------------
 #                            === INTROSPECTION ===
 #
@@ -2028,7 +2822,7 @@ class ParserReflect(object):
         parts = []
         try:
             if self.start:
-                parts.append(self.start)
+                parts.append(self.start if isinstance(self.start, str) else ' '.join(self.start))
             if self.prec:
                 parts.append(''.join([''.join(p) for p in self.prec]))
             if self.tokens:
@@ -2082,7 +2876,10 @@ class ParserReflect(object):
     # Validate the start symbol
     def validate_start(self):
         if self.start is not None:
-            if not isinstance(self.start, str):
+            if isinstance(self.start, (list, tuple)):
+                if not self.start or not all(isinstance(s, str) for s in self.start):
+                    self.log.error("'start' must be a string or a list of strings")
+            elif not isinstance(self.start, str):
                 self.log.error("'start' must be a string")
 
     # Look for error handler
@@ -2217,6 +3014,9 @@ class ParserReflect(object):
                 reqargs = 2
             else:
                 reqargs = 1
+            if getattr(func, 'positional', False):
+                # Arguments are the right-hand-side values. Their number depends on the rule
+                reqargs = func.__code__.co_argcount
             if func.__code__.co_argcount > reqargs:
                 self.log.error('%s:%d: Rule %r has too many arguments', file, line, func.__name__)
                 self.error = True
@@ -2231,6 +3031,8 @@ class ParserReflect(object):
                     parsed_g = parse_grammar(doc, file, line)
                     for g in parsed_g:
                         grammar.append((name, g))
+                    if getattr(func, 'positional', False):
+                        self.validate_positional(func, parsed_g)
                 except SyntaxError as e:
                     self.log.error(str(e))
                     self.error = True
@@ -2262,6 +3064,241 @@ class ParserReflect(object):
 
         self.grammar = grammar
 
+    # Check that a @positional rule function accepts one argument per symbol
+    # on the right hand side of every rule it implements
+    def validate_positional(self, func, parsed_g):
+        code = func.__code__
+        if code.co_flags & inspect.CO_VARARGS:
+            return
+        nargs = code.co_argcount - (1 if isinstance(func, types.MethodType) else 0)
+        for file, line, prodname, syms in parsed_g:
+            nsyms = syms.index('%prec') if '%prec' in syms else len(syms)
+            if nsyms != nargs:
+                self.log.error('%s:%d: Rule %r has %d symbols, but %r takes %d arguments',
+                               file, line, prodname, nsyms, func.__name__, nargs)
+                self.error = True
+
+# -----------------------------------------------------------------------------
+# BackgroundParser
+#
+# Returned by yacc(background=True).  The parser is built on a worker thread
+# while the caller continues.  Any attribute access or assignment (such as
+# parse()) waits for the build to finish and is then forwarded to the parser.
+# If the build fails, the exception is raised in the waiting thread instead.
+# -----------------------------------------------------------------------------
+
+class BackgroundParser(object):
+    def __init__(self, build):
+        self._parser = None
+        self._error = None
+        self._ready = threading.Event()
+        self.build_time = None         # Seconds taken to build (None until done)
+        self._thread = threading.Thread(target=self._run, args=(build,), daemon=True)
+        self._thread.start()
+
+    def _run(self, build):
+        start = time.perf_counter()
+        try:
+            self._parser = build()
+        except BaseException as e:
+            self._error = e
+        self.build_time = time.perf_counter() - start
+        self._ready.set()
+
+    # Return True if the build has finished (successfully or not)
+    def done(self):
+        return self._ready.is_set()
+
+    # Wait for the build to finish and return the parser
+    def wait(self, timeout=None):
+        if not self._ready.wait(timeout):
+            raise TimeoutError('Parser is still being built')
+        if self._error:
+            raise self._error
+        return self._parser
+
+    def parse(self, *args, **kwargs):
+        return self.wait().parse(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.wait(), name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_') or name == 'build_time':
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.wait(), name, value)
+
+# -----------------------------------------------------------------------------
+# CachingParser
+#
+# Wraps a parser and remembers the results of parse() by input.  Results are
+# keyed by a hash of the input text, the start symbol, the tracking flag and
+# digests of the grammar and the lexer, and kept in a least recently used cache
+# of at most maxsize entries.  If filename is given, results are also pickled
+# to a shelve database, which is cleared when it was written for another
+# grammar or another lexer.  Results are returned as they are unless
+# copy_results is set, in which case every hit returns a deep copy.  The hits
+# and misses attributes count the lookups.
+# -----------------------------------------------------------------------------
+
+class CachingParser(object):
+    def __init__(self, parser, lexer=None, maxsize=128, copy_results=False, filename=None):
+        self.parser = parser
+        self.lexer = lexer
+        self.maxsize = maxsize
+        self.copy_results = copy_results
+        self.hits = 0
+        self.misses = 0
+        self.cache = collections.OrderedDict()
+        self.grammar = _grammar_digest(parser)
+        self._lexer = None              # Last lexer used and its digest
+        self._lexerdigest = ''
+        self.store = None
+        if filename:
+            import shelve
+            self.store = shelve.open(filename)
+            if self.store.get('grammar') != self._store_digest():
+                self.clear()
+
+    # Digest of the lexer, remembered for the last lexer used
+    def lexer_digest(self, lexer):
+        if lexer is not self._lexer:
+            self._lexerdigest = _lexer_digest(lexer) if lexer else ''
+            self._lexer = lexer
+        return self._lexerdigest
+
+    # Digest that the results on disk were written for
+    def _store_digest(self):
+        return self.grammar + self.lexer_digest(self.lexer)
+
+    def key(self, input, tracking=False, start=None, lexer=None):
+        h = hashlib.sha256(self.grammar.encode())
+        h.update(self.lexer_digest(lexer or self.lexer).encode())
+        h.update(repr((start, bool(tracking))).encode())
+        if isinstance(input, str):
+            input = input.encode('utf-8', 'surrogatepass')
+        h.update(input)
+        return h.hexdigest()
+
+    def parse(self, input, lexer=None, debug=False, tracking=False, start=None):
+        lexer = lexer or self.lexer
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
+        key = self.key(input, tracking, start, lexer)
+        if key in self.cache:
+            result = self.cache[key]
+            self.cache.move_to_end(key)
+        elif self.store is not None and key in self.store:
+            result = self._remember(key, self.store[key])
+        else:
+            self.misses += 1
+            result = self.parser.parse(input, lexer, debug, tracking, start)
+            if self.store is not None:
+                self.store[key] = result
+            self._remember(key, copy.deepcopy(result) if self.copy_results else result)
+            return result
+
+        self.hits += 1
+        return copy.deepcopy(result) if self.copy_results else result
+
+    def _remember(self, key, result):
+        self.cache[key] = result
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return result
+
+    # Forget all results, including those on disk
+    def clear(self):
+        self.cache.clear()
+        if self.store is not None:
+            self.store.clear()
+            self.store['grammar'] = self._store_digest()
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+# Digest of everything about a parser that its results depend on: the grammar
+# signature and the code of the grammar rule functions
+def _grammar_digest(parser):
+    h = hashlib.sha256((parser.signature or '').encode())
+    for p in parser.productions:
+        h.update(str(p).encode())
+        code = getattr(p.callable, '__code__', None)
+        if code:
+            _digest_code(h, code)
+    return h.hexdigest()
+
+# Digest of everything about a lexer that its tokens depend on: the regular
+# expressions, ignored and literal characters, and the code of the rule
+# functions.  Lexers not built by lex() are only known by their class.
+def _lexer_digest(lexer):
+    if not hasattr(lexer, 'lexstatere'):
+        cls = type(lexer)
+        return hashlib.sha256(('%s.%s' % (cls.__module__, cls.__qualname__)).encode()).hexdigest()
+    h = hashlib.sha256(repr((lexer.lexreflags, sorted(lexer.lextokens or ()), lexer.lexliterals,
+                             lexer.lexstateinfo, lexer.lexstateretext,
+                             lexer.lexstateignore)).encode())
+    funcs = list(lexer.lexstateerrorf.values()) + list(lexer.lexstateeoff.values())
+    for state in lexer.lexstatere:
+        for _, lexindexfunc in lexer.lexstatere[state]:
+            funcs.extend(f[0] for f in lexindexfunc if f)
+    for f in funcs:
+        code = getattr(f, '__code__', None)
+        if code:
+            h.update(f.__name__.encode())
+            _digest_code(h, code)
+    return h.hexdigest()
+
+def _digest_code(h, code):
+    h.update(code.co_code)
+    for names in (code.co_names, code.co_varnames, code.co_freevars, code.co_cellvars):
+        h.update(repr(names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _digest_code(h, const)
+        else:
+            h.update(_const_repr(const).encode())
+
+# repr() of a code constant that does not depend on the hash seed
+def _const_repr(const):
+    if isinstance(const, frozenset):
+        return 'frozenset({%s})' % ', '.join(sorted(_const_repr(c) for c in const))
+    if isinstance(const, tuple):
+        return '(%s)' % ', '.join(_const_repr(c) for c in const)
+    return repr(const)
+
+# -----------------------------------------------------------------------------
+# Parser cache
+#
+# Parsers built for classes are cached by class, and by signature and options
+# within a class (see yacc()).  The cache holds templates whose productions refer
+# to the grammar rule methods by name only, so it keeps neither the first object
+# nor, through the weak keys, the class alive.
+# -----------------------------------------------------------------------------
+
+_parser_cache = weakref.WeakKeyDictionary()
+
+# Cache a newly built parser.  The parser gets bound copies of the productions,
+# while the productions of the grammar (also referenced by its LR items and any
+# lazy table) are unbound and shared with the template.
+def _cache_parser(cls, cachekey, parser):
+    productions = parser.productions
+    parser.productions = [copy.copy(p) for p in productions]
+    for p in productions:
+        p.callable = None
+    template = copy.copy(parser)
+    template.productions = productions
+    template.errorfunc = None
+    _parser_cache.setdefault(cls, {})[cachekey] = template
+
+# Forget all parsers cached for classes
+def clear_cache():
+    _parser_cache.clear()
+
 # -----------------------------------------------------------------------------
 # yacc(module)
 #
@@ -2270,7 +3307,9 @@ class ParserReflect(object):
 
 def yacc(*, debug=yaccdebug, module=None, start=None,
          check_recursion=True, optimize=False, debugfile=debug_file,
-         debuglog=None, errorlog=None):
+         debuglog=None, errorlog=None, collapse_units=False, default_reductions=True,
+         compress=False, runtime_only=False, kernel_hash=False, background=False,
+         lazy=False, cache=True):
 
     # Reference to the parsing method of the last built parser
     global parse
@@ -2279,7 +3318,9 @@ def yacc(*, debug=yaccdebug, module=None, start=None,
         errorlog = PlyLogger(sys.stderr)
 
     # Get the module dictionary used for the parser
-    if module:
+    if isinstance(module, dict):
+        pdict = dict(module)
+    elif module:
         _items = [(k, getattr(module, k)) for k in dir(module)]
         pdict = dict(_items)
         # If no __file__ or __package__ attributes are available, try to obtain them
@@ -2296,6 +3337,29 @@ def yacc(*, debug=yaccdebug, module=None, start=None,
     if start is not None:
         pdict['start'] = start
 
+    options = dict(debug=debug, start=start, check_recursion=check_recursion,
+                   optimize=optimize, debugfile=debugfile, debuglog=debuglog,
+                   errorlog=errorlog, collapse_units=collapse_units,
+                   default_reductions=default_reductions, compress=compress,
+                   runtime_only=runtime_only, kernel_hash=kernel_hash, lazy=lazy)
+
+    # Build the parser on a worker thread.  The module dictionary has already
+    # been collected above since the caller's frame is not available there.
+    # The worker leaves the global parse() alone; it refers to the proxy.
+    if background:
+        parser = BackgroundParser(lambda: _yacc(pdict, pdict, cache=False, **options))
+        parse = parser.parse
+        return parser
+
+    parser = _yacc(module, pdict, cache=cache, **options)
+    parse = parser.parse
+    return parser
+
+# Build a parser from the dictionary collected by yacc()
+def _yacc(module, pdict, *, debug, start, check_recursion, optimize, debugfile,
+          debuglog, errorlog, collapse_units, default_reductions, compress,
+          runtime_only, kernel_hash, lazy, cache):
+
     # Collect parser information from the dictionary
     pinfo = ParserReflect(pdict, log=errorlog)
     pinfo.get_all()
@@ -2303,6 +3367,23 @@ def yacc(*, debug=yaccdebug, module=None, start=None,
     if pinfo.error:
         raise YaccError('Unable to build parser')
 
+    # A parser defined by a class (or an instance of it) is only built once.  Later
+    # requests for the same class, grammar and options get a copy of the cached
+    # parser whose productions are bound to the new object.
+    cachekey = None
+    if cache and not debug and module and not isinstance(module, (types.ModuleType, dict)):
+        cls = module if inspect.isclass(module) else type(module)
+        cachekey = (pinfo.signature(), check_recursion, collapse_units, default_reductions,
+                    compress, runtime_only, kernel_hash, lazy)
+        cached = _parser_cache.get(cls, {}).get(cachekey)
+        if cached:
+            parser = copy.copy(cached)
+            parser.productions = [copy.copy(p) for p in cached.productions]
+            for p in parser.productions:
+                p.bind(pdict)
+            parser.errorfunc = pinfo.error_func
+            return parser
+
     if debuglog is None:
         if debug:
             try:
@@ -2431,7 +3512,10 @@ def yacc(*, debug=yaccdebug, module=None, start=None,
         raise YaccError('Unable to build parser')
 
     # Run the LRTable on the grammar
-    lr = LRTable(grammar, debuglog)
+    if lazy:
+        lr = LazyLRTable(grammar, debuglog)
+    else:
+        lr = LRTable(grammar, debuglog, kernel_hash)
 
     if debug:
         num_sr = len(lr.sr_conflicts)
@@ -2476,7 +3560,62 @@ def yacc(*, debug=yaccdebug, module=None, start=None,
 
     # Build the parser
     lr.bind_callables(pinfo.pdict)
+
+    # With lazy tables, none of the options below apply
+    if lazy:
+        parser = LRParser(lr, pinfo.error_func)
+        parser.lrtable = lr
+        parser.signature = pinfo.signature()
+        if cachekey:
+            _cache_parser(cls, cachekey, parser)
+        return parser
+
+    if collapse_units:
+        num_collapsed = lr.collapse_unit_productions()
+        debuglog.info('')
+        debuglog.info('Unit productions: %d goto entries collapsed', num_collapsed)
+
+    if default_reductions:
+        num_removed = lr.set_default_reductions()
+        debuglog.info('')
+        debuglog.info('Default reductions: %d action entries removed from %d states',
+                      num_removed, len(lr.lr_default))
+
+    if compress:
+        num_actions, num_gotos = lr.compress_tables()
+        debuglog.info('')
+        debuglog.info('Packed tables: %d distinct action rows, %d distinct goto rows for %d states',
+                      num_actions, num_gotos, len(lr.lr_action))
+
+    if runtime_only:
+        lr.release_construction_data(pinfo.pdict)
+
     parser = LRParser(lr, pinfo.error_func)
+    parser.signature = pinfo.signature()
+    if cachekey:
+        _cache_parser(cls, cachekey, parser)
 
-    parse = parser.parse
     return parser
+
+# -----------------------------------------------------------------------------
+# @positional
+#
+# This decorator changes the calling convention of a grammar rule function.
+# Instead of a YaccProduction object, the function receives the values of the
+# right-hand-side symbols as positional arguments and its return value becomes
+# the value of the left-hand-side (p[0]).  If the function declares a
+# keyword-only argument named 'p', the YaccProduction object is passed in that
+# argument so that positional information (lineno, lexpos, etc.) remains
+# available.
+#
+#     @positional
+#     def p_expr_plus(lhs, op, rhs):
+#         'expr : expr PLUS expr'
+#         return lhs + rhs
+# -----------------------------------------------------------------------------
+
+def positional(f):
+    code = f.__code__
+    kwonly = code.co_varnames[code.co_argcount:code.co_argcount + code.co_kwonlyargcount]
+    f.positional = 'p' if 'p' in kwonly else True
+    return f
@@ -0,0 +1,43 @@
+# -----------------------------------------------------------------------------
+# lex_backend.py
+#
+# Building a lexer with another regular expression engine
+# -----------------------------------------------------------------------------
+
+import re
+import ply.lex as lex
+
+class RecordingEngine:
+    error = re.error
+
+    def __init__(self):
+        self.patterns = []
+
+    def compile(self, pattern, flags=0):
+        self.patterns.append(pattern)
+        return re.compile(pattern, flags)
+
+tokens = ('IF', 'ELSE', 'NAME', 'NUMBER')
+
+t_ignore = ' '
+t_IF = r'if'
+t_ELSE = r'else'
+t_NUMBER = r'\d+'
+
+def t_NAME(t):
+    r'[A-Z]\w*'
+    return t
+
+def t_error(t):
+    print("Illegal character '%s'" % t.value[0])
+    t.lexer.skip(1)
+
+engine = RecordingEngine()
+lexer = lex.lex(backend=engine)
+print(len(engine.patterns) > 0, all(isinstance(p, str) for p in engine.patterns))
+print(lexer.lexretext[0] in engine.patterns)
+lexer.input("if X else 42")
+print([tok.type for tok in lexer])
+lexer = lex.lex(backend='re')
+lexer.input("else Y")
+print([tok.type for tok in lexer])
@@ -0,0 +1,28 @@
+# -----------------------------------------------------------------------------
+# lex_background.py
+#
+# Building the lexer on a worker thread
+# -----------------------------------------------------------------------------
+
+import ply.lex as lex
+
+tokens = [
+    "PLUS",
+    "MINUS",
+    "NUMBER",
+    ]
+
+t_PLUS = r'\+'
+t_MINUS = r'-'
+t_NUMBER = r'\d+'
+
+t_ignore = " \t"
+
+def t_error(t):
+    pass
+
+lexer = lex.lex(background=True)
+lexer.lineno = 3
+lex.runmain(data="3 + 4")
+print(lexer.done(), isinstance(lexer.build_time, float), isinstance(lexer.wait(), lex.Lexer))
+print(lex.lexer is lexer)
@@ -0,0 +1,29 @@
+# lex_backtrack.py
+#
+# Rules that can make re backtrack excessively are reported
+
+import ply.lex as lex
+
+tokens = [
+    "WORDS",
+    "NUMBER",
+    "STRING",
+    "PAIR",
+    "LIST",
+    "AS",
+    ]
+
+t_NUMBER = r'\d+(\.\d+)?'
+t_STRING = r'"([^"\\]|\\.)*"'
+t_PAIR = r'\d+\d*:'
+t_LIST = r'(.*,)*x'
+t_AS = r'(a|a)+;'
+
+def t_WORDS(t):
+    r'(\w+\s?)+;'
+    return t
+
+def t_error(t):
+    pass
+
+lex.lex(check_backtracking=True)
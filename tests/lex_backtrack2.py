@@ -0,0 +1,25 @@
+# lex_backtrack2.py
+#
+# Backtracking problems are errors when check_backtracking='error'
+
+import ply.lex as lex
+
+tokens = [
+    "WORDS",
+    "NUMBER",
+    "STRING",
+    "PAIR",
+    ]
+
+t_NUMBER = r'\d+(\.\d+)?'
+t_STRING = r'"([^"\\]|\\.)*"'
+t_PAIR = r'\d+\d*:'
+
+def t_WORDS(t):
+    r'(\w+\s?)+;'
+    return t
+
+def t_error(t):
+    pass
+
+lex.lex(check_backtracking='error')
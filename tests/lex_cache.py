@@ -0,0 +1,48 @@
+# -----------------------------------------------------------------------------
+# lex_cache.py
+#
+# Lexers for instances of the same class are built only once
+# -----------------------------------------------------------------------------
+
+import gc
+import weakref
+
+import ply.lex as lex
+
+class CountingLexer:
+    tokens = ('NAME', 'NUMBER')
+
+    t_NAME = r'[a-z]+'
+    t_ignore = ' '
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.lexer = lex.lex(object=self)
+
+    def t_NUMBER(self, t):
+        r'\d+'
+        self.count += 1
+        return t
+
+    def t_error(self, t):
+        print("%s: Illegal character '%s'" % (self.name, t.value[0]))
+        t.lexer.skip(1)
+
+a = CountingLexer('a')
+b = CountingLexer('b')
+print(a.lexer is not b.lexer, a.lexer.lexstatere['INITIAL'][0][0] is b.lexer.lexstatere['INITIAL'][0][0])
+b.lexer.input("x 1 2 ? 3")
+print([tok.type for tok in b.lexer])
+print(a.count, b.count)
+
+# The cache keeps neither the objects nor the classes it was filled from alive
+Temp = type('Temp', (CountingLexer,), {})
+t = Temp('t')
+c = CountingLexer('c')
+refs = [weakref.ref(a), weakref.ref(t), weakref.ref(Temp)]
+del a, t, Temp
+gc.collect()
+print([ref() is None for ref in refs], len(lex._lexer_cache))
+lex.clear_cache()
+print(len(lex._lexer_cache))
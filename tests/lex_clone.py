@@ -0,0 +1,55 @@
+# -----------------------------------------------------------------------------
+# lex_clone.py
+#
+# Cloning a lexer onto a new object rebinds its rules state by state
+# -----------------------------------------------------------------------------
+
+import ply.lex as lex
+
+class CommentLexer:
+    tokens = ('NAME', 'COMMENT')
+
+    states = (('comment', 'exclusive'),)
+
+    t_ignore = ' '
+    t_comment_ignore = ' '
+
+    def __init__(self, name):
+        self.name = name
+
+    def t_NAME(self, t):
+        r'[a-z]+'
+        t.value = (self.name, t.value)
+        return t
+
+    def t_begin_comment(self, t):
+        r'/\*'
+        t.lexer.begin('comment')
+
+    def t_comment_COMMENT(self, t):
+        r'\*/'
+        t.lexer.begin('INITIAL')
+        t.value = self.name
+        return t
+
+    def t_comment_body(self, t):
+        r'[^*]+'
+
+    def t_error(self, t):
+        print("%s: Illegal character '%s'" % (self.name, t.value[0]))
+        t.lexer.skip(1)
+
+    t_comment_error = t_error
+
+a = CommentLexer('a')
+lexer = lex.lex(object=a, cache=False)
+b = CommentLexer('b')
+clone = lexer.clone(b)
+print(clone.lexstatere['INITIAL'][0][0] is lexer.lexstatere['INITIAL'][0][0])
+print('comment' in clone.lexstatere, sorted(clone.lexstatere))
+clone.input("x /* y */ z ?")
+for tok in clone:
+    print(tok.type, tok.value)
+again = clone.clone(a)
+again.input("w")
+print(again.token().value)
@@ -0,0 +1,84 @@
+# -----------------------------------------------------------------------------
+# lex_dfa.py
+#
+# The DFA engine produces the same tokens as the re engine
+# -----------------------------------------------------------------------------
+
+import ply.lex as lex
+
+tokens = ('NAME', 'NUMBER', 'FLOAT', 'EQ', 'ASSIGN', 'STRING', 'LOOK', 'OP')
+
+states = (('look', 'exclusive'), ('ops', 'exclusive'))
+
+literals = '+'
+
+t_ignore = ' \t'
+t_EQ = r'=='
+t_ASSIGN = r'='
+t_NAME = r'[^\W\d]\w*'
+
+def t_FLOAT(t):
+    r'(?P<whole>\d+)\.(?P<frac>\d*)'
+    t.value = (t.lexer.lexmatch.group('whole'), t.lexer.lexmatch.group('frac'))
+    return t
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_STRING(t):
+    r'"(.|\n)*?"'
+    t.lexer.lineno += t.value.count('\n')
+    return t
+
+def t_comment(t):
+    r'/\*(.|\n)*?\*/'
+
+def t_begin_look(t):
+    r'\$'
+    t.lexer.begin('look')
+
+def t_look_LOOK(t):
+    r'[a-z]+(?=;)'
+    return t
+
+def t_look_end(t):
+    r';'
+    t.lexer.begin('INITIAL')
+
+def t_begin_ops(t):
+    r'@'
+    t.lexer.begin('ops')
+
+# re takes the first alternative that matches, not the longest one
+def t_ops_OP(t):
+    r'=|=='
+    return t
+
+def t_ops_end(t):
+    r';'
+    t.lexer.begin('INITIAL')
+
+t_look_ignore = ''
+t_ops_ignore = ''
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_ANY_error(t):
+    print("Illegal character %s" % ascii(t.value[0]))
+    t.lexer.skip(1)
+
+data = 'x == 12.5 /* a */ = "s\n*/" + 7. héllo\n$abc;@==; ü € ωmega /* b */ 3'
+
+result = {}
+for dfa in (False, True):
+    lexer = lex.lex(dfa=dfa)
+    lexer.input(data)
+    result[dfa] = [(tok.type, tok.value, tok.lineno, tok.lexpos) for tok in lexer]
+
+print(result[True] == result[False])
+print([type(ritem[0][0]).__name__ for state, ritem in sorted(lexer.lexstatere.items())])
+print(ascii(result[True]))
@@ -0,0 +1,61 @@
+# -----------------------------------------------------------------------------
+# lex_parallel.py
+#
+# Lexing in worker processes with chunk boundaries inside comments and strings
+# -----------------------------------------------------------------------------
+
+import ply.lex as lex
+
+tokens = ('NAME', 'NUMBER', 'STRING', 'COMMENT')
+
+states = (('comment', 'exclusive'),)
+
+t_ignore = ' '
+t_NAME = r'[a-z]+'
+t_NUMBER = r'\d+'
+t_STRING = r'"[^"]*"'
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_comment(t):
+    r'/\*'
+    t.lexer.begin('comment')
+    t.lexer.comment_start = t.lexpos
+
+def t_comment_end(t):
+    r'\*/'
+    t.value = t.lexer.lexdata[t.lexer.comment_start:t.lexer.lexpos]
+    t.type = 'COMMENT'
+    t.lexer.begin('INITIAL')
+    return t
+
+def t_comment_body(t):
+    r'[^*\n]+|\*'
+
+def t_comment_newline(t):
+    r'\n'
+    t.lexer.lineno += 1
+
+t_comment_ignore = ''
+
+# Only text outside of strings and comments is checked.  Workers whose chunk
+# starts inside one of them see the '@' but must not report it.
+def t_ANY_error(t):
+    raise SyntaxError("Illegal character %r at %d" % (t.value[0], t.lexpos))
+
+data = ('a 1 "two\n@\nlines" b\n'
+        '/* a\ncomment @\nhere */ c 3\n\n\n'
+        'd "e" 44\nf g\n') * 5
+
+lexer = lex.lex()
+lexer.input(data)
+expected = [(t.type, t.value, t.lineno, t.lexpos) for t in lexer]
+
+lexer.lineno = 1
+for chunksize in (1, 5, 16, 1000):
+    result = lex.lex_parallel(lexer, data, workers=2, chunksize=chunksize)
+    print(chunksize, [(t.type, t.value, t.lineno, t.lexpos) for t in result] == expected,
+          any(hasattr(t, 'lexer') for t in result))
+print(len(expected))
@@ -0,0 +1,32 @@
+# -----------------------------------------------------------------------------
+# lex_peek.py
+#
+# Looking ahead with peek() and pushing tokens back with unget()
+# -----------------------------------------------------------------------------
+
+import ply.lex as lex
+
+tokens = ('NAME', 'NUMBER')
+
+t_ignore = ' '
+t_NAME = r'[a-z]+'
+t_NUMBER = r'\d+'
+
+def t_error(t):
+    print("Illegal character '%s'" % t.value[0])
+    t.lexer.skip(1)
+
+lexer = lex.lex()
+lexer.input('a 1 b 2 c')
+print(lexer.peek().value, lexer.peek(3).value, lexer.peek(6))
+first = lexer.token()
+second = lexer.token()
+print(first.value, second.value)
+lexer.unget(second)
+lexer.unget(first)
+snap = lexer.snapshot()
+print([tok.value for tok in lexer])
+lexer.restore(snap)
+print(lexer.peek(2).value, [tok.value for tok in lexer])
+lexer.input('d')
+print([tok.value for tok in lexer])
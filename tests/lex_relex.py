@@ -0,0 +1,66 @@
+# -----------------------------------------------------------------------------
+# lex_relex.py
+#
+# Updating a token list with relex() after edits of the input
+# -----------------------------------------------------------------------------
+
+import random
+
+import ply.lex as lex
+
+tokens = ('NAME', 'INT', 'FLOAT', 'DOT', 'STRING')
+
+t_ignore = ' '
+t_NAME = r'[a-z]+'
+t_FLOAT = r'\d+\.\d+'
+t_INT = r'\d+'
+t_DOT = r'\.'
+t_STRING = r'"[^"]*"'
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_error(t):
+    t.lexer.skip(1)
+
+def fields(toks):
+    return [(t.type, t.value, t.lineno, t.lexpos) for t in toks]
+
+def lex_all(lexer, data):
+    lexer.input(data)
+    lexer.lineno = 1
+    return list(lexer)
+
+lexer = lex.lex()
+checker = lexer.clone()
+
+data = 'abc 12 x.y\n1. "two\nlines" z\n\nlast 3\n'
+toks = lex_all(lexer, data)
+
+# Typing a digit turns INT and DOT into a FLOAT
+start, end, new = lexer.relex(toks, 13, 0, '5')
+print(start, end, fields(new))
+print(fields(toks) == fields(lex_all(checker, lexer.lexdata)))
+
+# Deleting a quote changes everything after it
+start, end, new = lexer.relex(toks, 15, 1, '')
+print(start, end, len(toks))
+print(fields(toks) == fields(lex_all(checker, lexer.lexdata)))
+
+# A quote skipped by the error rule on an earlier line now starts a string
+toks = lex_all(lexer, 'x = "abc\ndef\n')
+start, end, new = lexer.relex(toks, 12, 0, '"')
+print(start, end, fields(new))
+print(fields(toks) == fields(lex_all(checker, lexer.lexdata)))
+
+rnd = random.Random(7)
+ok = True
+for _ in range(300):
+    data = lexer.lexdata
+    offset = rnd.randrange(len(data) + 1)
+    removed = rnd.randrange(min(3, len(data) - offset) + 1)
+    text = ''.join(rnd.choice('ab1 .\n"') for _ in range(rnd.randrange(3)))
+    lexer.relex(toks, offset, removed, text)
+    ok = ok and fields(toks) == fields(lex_all(checker, lexer.lexdata))
+print(ok)
@@ -0,0 +1,40 @@
+# -----------------------------------------------------------------------------
+# lex_segments.py
+#
+# Rules that reuse an inner group name are split into as few master
+# regular expressions as possible
+# -----------------------------------------------------------------------------
+
+import ply.lex as lex
+
+tokens = ('HEX', 'OCT', 'BIN', 'NAME')
+
+t_ignore = ' '
+
+def t_HEX(t):
+    r'0x(?P<digits>[0-9a-f]+)'
+    t.value = int(t.lexer.lexmatch.group('digits'), 16)
+    return t
+
+def t_OCT(t):
+    r'0o(?P<digits>[0-7]+)'
+    t.value = int(t.lexer.lexmatch.group('digits'), 8)
+    return t
+
+def t_NAME(t):
+    r'[a-z]+'
+    return t
+
+def t_BIN(t):
+    r'0b(?P<digits>[01]+)'
+    t.value = int(t.lexer.lexmatch.group('digits'), 2)
+    return t
+
+def t_error(t):
+    print("Illegal character '%s'" % t.value[0])
+    t.lexer.skip(1)
+
+lexer = lex.lex()
+print(len(lexer.lexretext))
+lexer.input("0x1f abc 0o17 0b101")
+print([(tok.type, tok.value) for tok in lexer])
@@ -0,0 +1,47 @@
+# -----------------------------------------------------------------------------
+# lex_snapshot.py
+#
+# Speculative lexing with snapshot() and restore()
+# -----------------------------------------------------------------------------
+
+import ply.lex as lex
+
+tokens = ('NAME', 'STRING', 'LQUOTE', 'RQUOTE')
+
+states = (('quoted', 'exclusive'),)
+
+t_ignore = ' '
+t_quoted_ignore = ''
+t_NAME = r'[a-z]+'
+t_quoted_STRING = r'[^"]+'
+
+def t_LQUOTE(t):
+    r'"'
+    t.lexer.push_state('quoted')
+    return t
+
+def t_quoted_RQUOTE(t):
+    r'"'
+    t.lexer.pop_state()
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_ANY_error(t):
+    print("Illegal character '%s'" % t.value[0])
+    t.lexer.skip(1)
+
+lexer = lex.lex()
+lexer.input('a "b c"\nd')
+print(lexer.token().value)
+snap = lexer.snapshot()
+print([(tok.type, tok.lineno) for tok in iter(lexer.token, None)], lexer.current_state())
+lexer.restore(snap)
+print(lexer.token().type, lexer.current_state(), lexer.lineno)
+inner = lexer.snapshot()
+lexer.input('x')
+print(lexer.token().value)
+lexer.restore(inner)
+print([tok.value for tok in lexer], lexer.current_state())
@@ -0,0 +1,36 @@
+# -----------------------------------------------------------------------------
+# lex_trie.py
+#
+# Literal string rules are merged into a trie without changing priorities
+# -----------------------------------------------------------------------------
+
+import ply.lex as lex
+
+tokens = ('WHILE', 'WHEN', 'WHERE', 'SHL', 'SHLEQ', 'LT', 'MINUS', 'ARROW',
+          'NAME', 'NUMBER')
+
+t_ignore = ' '
+t_WHILE = r'while'
+t_WHEN = r'when'
+t_WHERE = r'where'
+t_SHLEQ = r'<<='
+t_SHL = r'<<'
+t_LT = r'<'
+t_MINUS = r'[-]'
+t_ARROW = r'->'
+t_NUMBER = r'\d+'
+t_ignore_COMMENT = r'\#\#'
+
+def t_NAME(t):
+    r'[A-Z][a-z]*'
+    return t
+
+def t_error(t):
+    print("Illegal character '%s'" % t.value[0])
+    t.lexer.skip(1)
+
+lexer = lex.lex()
+print(len(lexer.lexretext), '(?P<t_WHILE>)' in lexer.lexretext[0])
+lexer.input("while when where Whence < << <<= <<<= -> - 12 ## X")
+for tok in lexer:
+    print(tok.type, tok.value)
@@ -123,6 +123,22 @@ class LexErrorWarningTests(unittest.TestCase):
                                     "No rules of the form t_rulename are defined\n"
                                     "No rules defined for state 'INITIAL'\n"))
 
+    def test_lex_backtrack(self):
+        run_import("lex_backtrack")
+        result = sys.stderr.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "lex_backtrack.py:22: Rule 't_WORDS' may take exponential time on some inputs (nested repeats can match the same text)\n"
+                                    "Rule 't_PAIR' may take polynomial time on some inputs (adjacent repeats match the same characters)\n"
+                                    "Rule 't_LIST' may take exponential time on some inputs (nested repeats can match the same text)\n"
+                                    "Rule 't_AS' may take exponential time on some inputs (alternatives of a repeated group overlap)\n"))
+
+    def test_lex_backtrack2(self):
+        self.assertRaises(SyntaxError,run_import,"lex_backtrack2")
+        result = sys.stderr.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "lex_backtrack2.py:18: Rule 't_WORDS' may take exponential time on some inputs (nested repeats can match the same text)\n"
+                                    "Rule 't_PAIR' may take polynomial time on some inputs (adjacent repeats match the same characters)\n"))
+
     def test_lex_error1(self):
         run_import("lex_error1")
         result = sys.stderr.getvalue()
@@ -345,6 +361,122 @@ class LexBuildOptionTests(unittest.TestCase):
                                     "(PLUS,'+',1,1)\n"
                                     "(NUMBER,4,1,2)\n"))
 
+    def test_lex_cache(self):
+        run_import("lex_cache")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "True True\n"
+                                    "b: Illegal character '?'\n"
+                                    "['NAME', 'NUMBER', 'NUMBER', 'NUMBER']\n"
+                                    "0 3\n"
+                                    "[True, True, True] 1\n"
+                                    "0\n"))
+
+    def test_lex_clone(self):
+        run_import("lex_clone")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "True\n"
+                                    "True ['INITIAL', 'comment']\n"
+                                    "NAME ('b', 'x')\n"
+                                    "COMMENT b\n"
+                                    "NAME ('b', 'z')\n"
+                                    "b: Illegal character '?'\n"
+                                    "('a', 'w')\n"))
+
+    def test_lex_snapshot(self):
+        run_import("lex_snapshot")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "a\n"
+                                    "[('LQUOTE', 1), ('STRING', 1), ('RQUOTE', 1), ('NAME', 2)] INITIAL\n"
+                                    "LQUOTE quoted 1\n"
+                                    "x\n"
+                                    "['b c', '\"', 'd'] INITIAL\n"))
+
+    def test_lex_peek(self):
+        run_import("lex_peek")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "a b None\n"
+                                    "a 1\n"
+                                    "['a', '1', 'b', '2', 'c']\n"
+                                    "1 ['a', '1', 'b', '2', 'c']\n"
+                                    "['d']\n"))
+
+    def test_lex_parallel(self):
+        run_import("lex_parallel")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "1 True False\n"
+                                    "5 True False\n"
+                                    "16 True False\n"
+                                    "1000 True False\n"
+                                    "60\n"))
+
+    def test_lex_relex(self):
+        run_import("lex_relex")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "4 7 [('NAME', 'y', 1, 9), ('FLOAT', '1.5', 2, 11)]\n"
+                                    "True\n"
+                                    "4 7 11\n"
+                                    "True\n"
+                                    "0 3 [('NAME', 'x', 1, 0), ('STRING', '\"abc\\ndef\"', 1, 4)]\n"
+                                    "True\n"
+                                    "True\n"))
+
+    def test_lex_dfa(self):
+        run_import("lex_dfa")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "Illegal character '\\u20ac'\n"
+                                    "Illegal character '\\u20ac'\n"
+                                    "True\n"
+                                    "['_DFAMatcher', 'Pattern', '_DFAMatcher']\n"
+                                    "[('NAME', 'x', 1, 0), ('EQ', '==', 1, 2), ('FLOAT', ('12', '5'), 1, 5), "
+                                    "('ASSIGN', '=', 1, 18), ('STRING', '\"s\\n*/\"', 1, 20), ('+', '+', 2, 27), "
+                                    "('FLOAT', ('7', ''), 2, 29), ('NAME', 'h\\xe9llo', 2, 32), ('LOOK', 'abc', 3, 39), "
+                                    "('OP', '=', 3, 44), ('OP', '=', 3, 45), "
+                                    "('NAME', '\\xfc', 3, 48), ('NAME', '\\u03c9mega', 3, 52), ('NUMBER', 3, 3, 66)]\n"))
+
+    def test_lex_trie(self):
+        run_import("lex_trie")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "1 True\n"
+                                    "WHILE while\n"
+                                    "WHEN when\n"
+                                    "WHERE where\n"
+                                    "NAME Whence\n"
+                                    "LT <\n"
+                                    "SHL <<\n"
+                                    "SHLEQ <<=\n"
+                                    "SHL <<\n"
+                                    "LT <\n"
+                                    "Illegal character '='\n"
+                                    "MINUS -\n"
+                                    "Illegal character '>'\n"
+                                    "MINUS -\n"
+                                    "NUMBER 12\n"
+                                    "NAME X\n"))
+
+    def test_lex_backend(self):
+        run_import("lex_backend")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "True True\n"
+                                    "True\n"
+                                    "['IF', 'NAME', 'ELSE', 'NUMBER']\n"
+                                    "['ELSE', 'NAME']\n"))
+
+    def test_lex_segments(self):
+        run_import("lex_segments")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "3\n"
+                                    "[('HEX', 31), ('NAME', 'abc'), ('OCT', 15), ('BIN', 5)]\n"))
+
     def test_lex_closure(self):
         run_import("lex_closure")
         result = sys.stdout.getvalue()
@@ -353,6 +485,16 @@ class LexBuildOptionTests(unittest.TestCase):
                                     "(PLUS,'+',1,1)\n"
                                     "(NUMBER,4,1,2)\n"))
 
+    def test_lex_background(self):
+        run_import("lex_background")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "(NUMBER,'3',3,0)\n"
+                                    "(PLUS,'+',3,2)\n"
+                                    "(NUMBER,'4',3,4)\n"
+                                    "True True True\n"
+                                    "True\n"))
+
     def test_lex_many_tokens(self):
         run_import("lex_many_tokens")
         result = sys.stdout.getvalue()
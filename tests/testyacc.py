@@ -93,6 +93,17 @@ class YaccErrorWarningTests(unittest.TestCase):
     def tearDown(self):
         sys.stderr = sys.__stderr__
         sys.stdout = sys.__stdout__
+    def test_yacc_background(self):
+        run_import("yacc_background")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "29\n"
+                                    "True True True\n"
+                                    "3\n"
+                                    "Error handler at '4'\n"
+                                    "True\n"
+                                    ))
+
     def test_yacc_badargs(self):
         self.assertRaises(ply.yacc.YaccError,run_import,"yacc_badargs")
         result = sys.stderr.getvalue()
@@ -108,6 +119,13 @@ class YaccErrorWarningTests(unittest.TestCase):
                                     "yacc_badid.py:33: Illegal rule name 'bad&rule'\n"
                                     ))
 
+    def test_yacc_badpositional(self):
+        self.assertRaises(ply.yacc.YaccError,run_import,"yacc_badpositional")
+        result = sys.stderr.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "yacc_badpositional.py:16: Rule 'expression' has 3 symbols, but 'p_expression_plus' takes 2 arguments\n"
+                                    ))
+
     def test_yacc_badprec(self):
         try:
             run_import("yacc_badprec")
@@ -150,6 +168,54 @@ class YaccErrorWarningTests(unittest.TestCase):
             self.assertTrue(check_expected(result,
                                         "tokens must be a list or tuple\n"))
 
+    def test_yacc_cache(self):
+        run_import("yacc_cache")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "True True\n"
+                                    "a: 13\n"
+                                    "b: 3\n"
+                                    "b: Syntax error at '1'\n"
+                                    "[True, True, True] 1\n"
+                                    "c: 6\n"
+                                    "0\n"
+                                    ))
+
+    def test_yacc_compress(self):
+        run_import("yacc_compress")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "PackedTable PackedTable\n"
+                                    "29\n"
+                                    "Syntax error at '2'\n"
+                                    "Group error\n"
+                                    "4\n"
+                                    ))
+
+    def test_yacc_defaults_error(self):
+        run_import("yacc_defaults_error")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "default_reductions=False a\n"
+                                    "default_reductions=True a\n"
+                                    ))
+
+    def test_yacc_defaults(self):
+        run_import("yacc_defaults")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "default_reductions=False entries=85\n"
+                                    "Lookup x\n"
+                                    "18\n"
+                                    "Syntax error at '3'\n"
+                                    "default_reductions=True entries=40\n"
+                                    "Lookup x\n"
+                                    "18\n"
+                                    "Lookup x\n"
+                                    "2\n"
+                                    "Syntax error at '3'\n"
+                                    ))
+
     def test_yacc_dup(self):
         run_import("yacc_dup")
         result = sys.stderr.getvalue()
@@ -232,6 +298,28 @@ class YaccErrorWarningTests(unittest.TestCase):
                                     "Infinite recursion detected for symbol 'statement'\n"
                                     "Infinite recursion detected for symbol 'expression'\n"
                                     ))
+    def test_yacc_kernel(self):
+        run_import("yacc_kernel")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "kernel_hash=False states=21\n"
+                                    "29\n"
+                                    "kernel_hash=True states=21\n"
+                                    "29\n"
+                                    ))
+
+    def test_yacc_lazy(self):
+        run_import("yacc_lazy")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "29\n"
+                                    "Syntax error at '+'\n"
+                                    "4\n"
+                                    "20 29\n"
+                                    "2\n"
+                                    "20 29\n"
+                                    ))
+
     def test_yacc_literal(self):
         self.assertRaises(ply.yacc.YaccError,run_import,"yacc_literal")
         result = sys.stderr.getvalue()
@@ -252,6 +340,23 @@ class YaccErrorWarningTests(unittest.TestCase):
                                     "yacc_missing1.py:21: Symbol 'location' used, but not defined as a token or a rule\n"
                                     ))
 
+    def test_yacc_multistart(self):
+        run_import("yacc_multistart")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "assign x\n"
+                                    "value 25\n"
+                                    "29\n"
+                                    "Syntax error at '='\n"
+                                    "2\n"
+                                    "assign x\n"
+                                    "value 25\n"
+                                    "29\n"
+                                    "Syntax error at '='\n"
+                                    "2\n"
+                                    "Unknown start symbol 'term'\n"
+                                    ))
+
     def test_yacc_nested(self):
         run_import("yacc_nested")
         result = sys.stdout.getvalue()
@@ -329,6 +434,15 @@ class YaccErrorWarningTests(unittest.TestCase):
                                     "Rule (rule5 -> A) is never reduced\n"
                                     ))
 
+    def test_yacc_runtime(self):
+        run_import("yacc_runtime")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "MiniProduction statement -> NAME EQUALS expression\n"
+                                    "True\n"
+                                    "29\n"
+                                    ))
+
     def test_yacc_simple(self):
         run_import("yacc_simple")
         result = sys.stderr.getvalue()
@@ -376,6 +490,14 @@ class YaccErrorWarningTests(unittest.TestCase):
                                     "Generating LALR tables\n"
                                     ))
 
+    def test_yacc_unit(self):
+        run_import("yacc_unit")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "collapse=False result=19 operands=term,factor,factor,term\n"
+                                    "collapse=True result=19 operands=primary,primary,primary,term\n"
+                                    ))
+
     def test_yacc_uprec(self):
         self.assertRaises(ply.yacc.YaccError,run_import,"yacc_uprec")
         result = sys.stderr.getvalue()
@@ -390,6 +512,57 @@ class YaccErrorWarningTests(unittest.TestCase):
                                     "yacc_uprec2.py:34: Syntax error. Nothing follows %prec\n"
                                     ))
 
+    def test_yacc_positional(self):
+        run_import("yacc_positional")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "Group at 4\n"
+                                    "15\n"
+                                    ))
+
+    def test_yacc_reparse(self):
+        run_import("yacc_reparse")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "('x90', ('+', 1234, ('*', 'y', ('-', 90, 'z')))) True\n"
+                                    "True\n"
+                                    "True 101\n"
+                                    "True 101\n"
+                                    "True 101\n"
+                                    ))
+
+    def test_yacc_snapshot(self):
+        run_import("yacc_snapshot")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "Syntax error at 'c'\n"
+                                    "[('a', ('+', 1, 2)), 'error', ('c', 4), ('d', ('-', 5, ('/', 6, 'y')))]\n"
+                                    "Syntax error at 'c'\n"
+                                    "5 0 True\n"
+                                    "Syntax error at 'c'\n"
+                                    "True\n"
+                                    "Syntax error at 'c'\n"
+                                    "13 1 True\n"
+                                    "True\n"
+                                    "Syntax error at 'c'\n"
+                                    "20 0 True\n"
+                                    "True\n"
+                                    ))
+
+    def test_yacc_caching(self):
+        run_import("yacc_caching")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "[['a', ['+', 1, 2]]] True 1 1 1\n"
+                                    "[['a', ['+', 1, 2]]] 2 1\n"
+                                    "1 5 2\n"
+                                    "[['a', 1], ['b', ['*', 'a', 2]]] 1 0\n"
+                                    "True 1\n"
+                                    "[['a', 1]] [['a', '1']] 2\n"
+                                    "1 [['a', '1']] 1\n"
+                                    "True\n"
+                                    ))
+
     def test_yacc_prec1(self):
         self.assertRaises(ply.yacc.YaccError,run_import,"yacc_prec1")
         result = sys.stderr.getvalue()
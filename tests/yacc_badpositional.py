@@ -0,0 +1,28 @@
+# -----------------------------------------------------------------------------
+# yacc_badpositional.py
+#
+# A @positional rule function with the wrong number of arguments
+# -----------------------------------------------------------------------------
+import ply.yacc as yacc
+from ply.yacc import positional
+
+from calclex import tokens
+
+def p_statement_expr(t):
+    'statement : expression'
+    print(t[1])
+
+@positional
+def p_expression_plus(left, right):
+    'expression : expression PLUS NUMBER'
+    return left + right
+
+@positional
+def p_expression_number(value):
+    'expression : NUMBER'
+    return value
+
+def p_error(t):
+    print("Syntax error at '%s'" % t.value)
+
+yacc.yacc()
@@ -0,0 +1,77 @@
+# -----------------------------------------------------------------------------
+# yacc_cache.py
+#
+# Parsers for instances of the same class are built only once
+# -----------------------------------------------------------------------------
+import gc
+import weakref
+
+import ply.yacc as yacc
+
+import calclex
+
+class Calc:
+    tokens = calclex.tokens
+
+    precedence = (
+        ('left','PLUS','MINUS'),
+        ('left','TIMES','DIVIDE'),
+        )
+
+    def __init__(self, name):
+        self.name = name
+        self.names = { }
+        self.parser = yacc.yacc(module=self)
+
+    def p_statement_assign(self, t):
+        'statement : NAME EQUALS expression'
+        self.names[t[1]] = t[3]
+
+    def p_statement_expr(self, t):
+        'statement : expression'
+        print("%s: %s" % (self.name, t[1]))
+
+    def p_expression_binop(self, t):
+        '''expression : expression PLUS expression
+                      | expression MINUS expression
+                      | expression TIMES expression
+                      | expression DIVIDE expression'''
+        if t[2] == '+'  : t[0] = t[1] + t[3]
+        elif t[2] == '-': t[0] = t[1] - t[3]
+        elif t[2] == '*': t[0] = t[1] * t[3]
+        elif t[2] == '/': t[0] = t[1] / t[3]
+
+    def p_expression_group(self, t):
+        'expression : LPAREN expression RPAREN'
+        t[0] = t[2]
+
+    def p_expression_number(self, t):
+        'expression : NUMBER'
+        t[0] = t[1]
+
+    def p_expression_name(self, t):
+        'expression : NAME'
+        t[0] = self.names.get(t[1], 0)
+
+    def p_error(self, t):
+        print("%s: Syntax error at '%s'" % (self.name, t.value))
+
+a = Calc('a')
+b = Calc('b')
+print(a.parser is not b.parser, a.parser.action is b.parser.action)
+a.parser.parse("x = 3 * 4", lexer=calclex.lexer)
+b.parser.parse("x = 2", lexer=calclex.lexer)
+a.parser.parse("x + 1", lexer=calclex.lexer)
+b.parser.parse("x + 1 1", lexer=calclex.lexer)
+
+# The cache keeps neither the objects nor the classes it was filled from alive
+Temp = type('Temp', (Calc,), {})
+t = Temp('t')
+c = Calc('c')
+refs = [weakref.ref(a), weakref.ref(t), weakref.ref(Temp)]
+del a, t, Temp
+gc.collect()
+print([ref() is None for ref in refs], len(yacc._parser_cache))
+c.parser.parse("2 * 3", lexer=calclex.lexer)
+yacc.clear_cache()
+print(len(yacc._parser_cache))
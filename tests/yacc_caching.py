@@ -0,0 +1,123 @@
+# -----------------------------------------------------------------------------
+# yacc_caching.py
+#
+# Reusing parse results with CachingParser
+# -----------------------------------------------------------------------------
+import os
+import tempfile
+
+import ply.lex as lex
+import ply.yacc as yacc
+
+import calclex
+from calclex import tokens, lexer
+
+# Parsing rules
+precedence = (
+    ('left','PLUS','MINUS'),
+    ('left','TIMES','DIVIDE'),
+    )
+
+parses = 0
+
+def p_program(t):
+    '''program : program statement
+               | statement'''
+    t[0] = t[1] + [t[2]] if len(t) == 3 else [t[1]]
+
+def p_statement_assign(t):
+    'statement : NAME EQUALS expression'
+    global parses
+    parses += 1
+    t[0] = [t[1], t[3]]
+
+def p_expression_binop(t):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression
+                  | expression TIMES expression
+                  | expression DIVIDE expression'''
+    t[0] = [t[2], t[1], t[3]]
+
+def p_expression_group(t):
+    'expression : LPAREN expression RPAREN'
+    t[0] = t[2]
+
+def p_expression_atom(t):
+    '''expression : NUMBER
+                  | NAME'''
+    t[0] = t[1]
+
+def p_error(t):
+    print("Syntax error at %r" % t.value)
+
+parser = yacc.yacc()
+
+# Results are shared unless they are copied
+cached = yacc.CachingParser(parser, lexer=lexer)
+first = cached.parse('a = 1 + 2')
+print(first, cached.parse('a = 1 + 2') is first, cached.hits, cached.misses, parses)
+
+cached = yacc.CachingParser(parser, lexer=lexer, copy_results=True)
+first = cached.parse('a = 1 + 2')
+first.append('changed')
+second = cached.parse('a = 1 + 2')
+second.append('changed again')
+print(cached.parse('a = 1 + 2'), cached.hits, cached.misses)
+
+# The least recently used result is dropped first
+cached = yacc.CachingParser(parser, lexer=lexer, maxsize=2)
+for text in ('a = 1', 'b = 2', 'a = 1', 'c = 3', 'b = 2', 'a = 1'):
+    cached.parse(text)
+print(cached.hits, cached.misses, len(cached.cache))
+
+# Results on disk survive the cache object, but not a change of grammar
+with tempfile.TemporaryDirectory() as tmpdir:
+    filename = os.path.join(tmpdir, 'results')
+    cached = yacc.CachingParser(parser, lexer=lexer, filename=filename)
+    cached.parse('a = 1\nb = a * 2')
+    cached.close()
+    cached = yacc.CachingParser(parser, lexer=lexer, filename=filename)
+    print(cached.parse('a = 1\nb = a * 2'), cached.hits, cached.misses)
+    cached.close()
+
+    other = yacc.yacc(start='statement', errorlog=yacc.NullLogger())
+    cached = yacc.CachingParser(other, lexer=lexer, filename=filename)
+    print(cached.grammar != yacc.CachingParser(parser).grammar, len(cached.store))
+    cached.close()
+
+# Results depend on the lexer too: this one keeps numbers as text
+def t_NUMBER(t):
+    r'\d+'
+    return t
+
+saved = lex.lexer, lex.token, lex.input
+textlexer = lex.lex(module=dict(vars(calclex), t_NUMBER=t_NUMBER))
+lex.lexer, lex.token, lex.input = saved
+
+cached = yacc.CachingParser(parser)
+print(cached.parse('a = 1', lexer=lexer), cached.parse('a = 1', lexer=textlexer), cached.misses)
+with tempfile.TemporaryDirectory() as tmpdir:
+    filename = os.path.join(tmpdir, 'results')
+    cached = yacc.CachingParser(parser, lexer=lexer, filename=filename)
+    cached.parse('a = 1')
+    cached.close()
+    cached = yacc.CachingParser(parser, lexer=textlexer, filename=filename)
+    print(len(cached.store), cached.parse('a = 1'), cached.misses)
+    cached.close()
+
+# Actions that only differ in a called name give different keys
+def atom_str(t):
+    '''expression : NUMBER
+                  | NAME'''
+    t[0] = str(t[1])
+
+def atom_repr(t):
+    '''expression : NUMBER
+                  | NAME'''
+    t[0] = repr(t[1])
+
+keys = []
+for atom in (atom_str, atom_repr):
+    other = yacc.yacc(module=dict(globals(), p_expression_atom=atom), errorlog=yacc.NullLogger())
+    keys.append(yacc.CachingParser(other, lexer=lexer).key('a = 1'))
+print(keys[0] != keys[1])
@@ -0,0 +1,66 @@
+# -----------------------------------------------------------------------------
+# yacc_compress.py
+#
+# Parsing with packed action and goto tables, including error recovery
+# -----------------------------------------------------------------------------
+import ply.yacc as yacc
+
+from calclex import tokens
+
+# Parsing rules
+precedence = (
+    ('left','PLUS','MINUS'),
+    ('left','TIMES','DIVIDE'),
+    ('right','UMINUS'),
+    )
+
+# dictionary of names
+names = { }
+
+def p_statement_assign(t):
+    'statement : NAME EQUALS expression'
+    names[t[1]] = t[3]
+
+def p_statement_expr(t):
+    'statement : expression'
+    print(t[1])
+
+def p_expression_binop(t):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression
+                  | expression TIMES expression
+                  | expression DIVIDE expression'''
+    if t[2] == '+'  : t[0] = t[1] + t[3]
+    elif t[2] == '-': t[0] = t[1] - t[3]
+    elif t[2] == '*': t[0] = t[1] * t[3]
+    elif t[2] == '/': t[0] = t[1] / t[3]
+
+def p_expression_uminus(t):
+    'expression : MINUS expression %prec UMINUS'
+    t[0] = -t[2]
+
+def p_expression_group(t):
+    'expression : LPAREN expression RPAREN'
+    t[0] = t[2]
+
+def p_expression_group_error(t):
+    'expression : LPAREN error RPAREN'
+    print("Group error")
+    t[0] = 0
+
+def p_expression_number(t):
+    'expression : NUMBER'
+    t[0] = t[1]
+
+def p_expression_name(t):
+    'expression : NAME'
+    t[0] = names.get(t[1], 0)
+
+def p_error(t):
+    print("Syntax error at '%s'" % t.value)
+
+import calclex
+parser = yacc.yacc(compress=True)
+print(type(parser.action).__name__, type(parser.goto).__name__)
+for data in ["a = 3 * (4 + 5)", "a - -2", "(1 2 3) + 4"]:
+    parser.parse(data, lexer=calclex.lexer)
@@ -0,0 +1,56 @@
+# -----------------------------------------------------------------------------
+# yacc_defaults.py
+#
+# Default reductions change when a syntax error is detected, but not the result
+# -----------------------------------------------------------------------------
+import ply.yacc as yacc
+
+from calclex import tokens
+
+precedence = (
+    ('left','PLUS','MINUS'),
+    ('left','TIMES','DIVIDE'),
+    )
+
+names = { 'x' : 2 }
+
+def p_statement_assign(t):
+    'statement : NAME EQUALS expression'
+    names[t[1]] = t[3]
+
+def p_statement_expr(t):
+    'statement : expression'
+    print(t[1])
+
+def p_expression_binop(t):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression
+                  | expression TIMES expression
+                  | expression DIVIDE expression'''
+    if t[2] == '+'  : t[0] = t[1] + t[3]
+    elif t[2] == '-': t[0] = t[1] - t[3]
+    elif t[2] == '*': t[0] = t[1] * t[3]
+    elif t[2] == '/': t[0] = t[1] / t[3]
+
+def p_expression_group(t):
+    'expression : LPAREN expression RPAREN'
+    t[0] = t[2]
+
+def p_expression_number(t):
+    'expression : NUMBER'
+    t[0] = t[1]
+
+def p_expression_name(t):
+    'expression : NAME'
+    print("Lookup %s" % t[1])
+    t[0] = names[t[1]]
+
+def p_error(t):
+    print("Syntax error at '%s'" % t.value)
+
+import calclex
+for defaults in (False, True):
+    parser = yacc.yacc(default_reductions=defaults)
+    print("default_reductions=%s entries=%d" % (defaults, sum(len(row) for row in parser.action.values())))
+    parser.parse("3 * (x + 4)", lexer=calclex.lexer)
+    parser.parse("x 3", lexer=calclex.lexer)
@@ -0,0 +1,30 @@
+# -----------------------------------------------------------------------------
+# yacc_defaults_error.py
+#
+# A state that reduces one rule on ordinary tokens and another one on 'error'
+# must not become a defaulted state when default reductions are used
+# -----------------------------------------------------------------------------
+import ply.yacc as yacc
+
+from calclex import tokens
+
+def p_start(p):
+    '''start : a NAME
+             | b error NUMBER'''
+    p[0] = p[1]
+
+def p_a(p):
+    'a :'
+    p[0] = 'a'
+
+def p_b(p):
+    'b :'
+    p[0] = 'b'
+
+def p_error(t):
+    print("Syntax error at %r" % (t.value if t else None))
+
+import calclex
+for defaults in (False, True):
+    parser = yacc.yacc(default_reductions=defaults)
+    print("default_reductions=%s %s" % (defaults, parser.parse("x", lexer=calclex.lexer)))
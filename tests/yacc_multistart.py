@@ -0,0 +1,73 @@
+# -----------------------------------------------------------------------------
+# yacc_multistart.py
+#
+# A grammar with several start symbols sharing one set of tables
+# -----------------------------------------------------------------------------
+import ply.yacc as yacc
+
+from calclex import tokens
+
+# Parsing rules
+precedence = (
+    ('left','PLUS','MINUS'),
+    ('left','TIMES','DIVIDE'),
+    ('right','UMINUS'),
+    )
+
+start = ['statement', 'expression']
+
+# dictionary of names
+names = { }
+
+def p_statement_assign(t):
+    'statement : NAME EQUALS expression'
+    names[t[1]] = t[3]
+    t[0] = 'assign %s' % t[1]
+
+def p_statement_expr(t):
+    'statement : expression'
+    t[0] = 'value %s' % t[1]
+
+def p_expression_binop(t):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression
+                  | expression TIMES expression
+                  | expression DIVIDE expression'''
+    if t[2] == '+'  : t[0] = t[1] + t[3]
+    elif t[2] == '-': t[0] = t[1] - t[3]
+    elif t[2] == '*': t[0] = t[1] * t[3]
+    elif t[2] == '/': t[0] = t[1] / t[3]
+
+def p_expression_uminus(t):
+    'expression : MINUS expression %prec UMINUS'
+    t[0] = -t[2]
+
+def p_expression_group(t):
+    'expression : LPAREN expression RPAREN'
+    t[0] = t[2]
+
+def p_expression_number(t):
+    'expression : NUMBER'
+    t[0] = t[1]
+
+def p_expression_name(t):
+    'expression : NAME'
+    t[0] = names.get(t[1], 0)
+
+def p_error(t):
+    if t:
+        print("Syntax error at '%s'" % t.value)
+    else:
+        print("Syntax error at EOF")
+
+import calclex
+for lazy in (False, True):
+    parser = yacc.yacc(lazy=lazy)
+    print(parser.parse("x = 3 * (4 + 5)", lexer=calclex.lexer))
+    print(parser.parse("x - 2", lexer=calclex.lexer, start='statement'))
+    print(parser.parse("x - -2", lexer=calclex.lexer, start='expression'))
+    print(parser.parse("x = 2", lexer=calclex.lexer, start='expression'))
+try:
+    parser.parse("2", lexer=calclex.lexer, start='term')
+except yacc.YaccError as e:
+    print(e)
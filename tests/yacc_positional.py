@@ -0,0 +1,54 @@
+# -----------------------------------------------------------------------------
+# yacc_positional.py
+#
+# Grammar rules using the @positional calling convention
+# -----------------------------------------------------------------------------
+import ply.yacc as yacc
+from ply.yacc import positional
+
+from calclex import tokens
+
+# Parsing rules
+precedence = (
+    ('left','PLUS','MINUS'),
+    ('left','TIMES','DIVIDE'),
+    ('right','UMINUS'),
+    )
+
+def p_statement_expr(t):
+    'statement : expression'
+    print(t[1])
+
+@positional
+def p_expression_binop(left, op, right):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression
+                  | expression TIMES expression
+                  | expression DIVIDE expression'''
+    if op == '+'  : return left + right
+    elif op == '-': return left - right
+    elif op == '*': return left * right
+    elif op == '/': return left / right
+
+@positional
+def p_expression_uminus(minus, value):
+    'expression : MINUS expression %prec UMINUS'
+    return -value
+
+@positional
+def p_expression_group(lparen, value, rparen, *, p):
+    'expression : LPAREN expression RPAREN'
+    print("Group at %d" % p.lexpos(1))
+    return value
+
+@positional
+def p_expression_number(value):
+    'expression : NUMBER'
+    return value
+
+def p_error(t):
+    print("Syntax error at '%s'" % t.value)
+
+parser = yacc.yacc()
+import calclex
+parser.parse("2 * (3 + 4) - -1", lexer=calclex.lexer)
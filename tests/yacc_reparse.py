@@ -0,0 +1,75 @@
+# -----------------------------------------------------------------------------
+# yacc_reparse.py
+#
+# Parsing again after edits with reparse()
+# -----------------------------------------------------------------------------
+import ply.yacc as yacc
+
+from calclex import tokens, lexer
+
+# Parsing rules
+precedence = (
+    ('left','PLUS','MINUS'),
+    ('left','TIMES','DIVIDE'),
+    )
+
+reductions = 0
+
+def p_program(t):
+    '''program : program statement
+               | statement'''
+    global reductions
+    reductions += 1
+    t[0] = t[1] + (t[2],) if len(t) == 3 else (t[1],)
+
+def p_statement_assign(t):
+    'statement : NAME EQUALS expression'
+    global reductions
+    reductions += 1
+    t[0] = (t[1], t[3])
+
+def p_expression_binop(t):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression
+                  | expression TIMES expression
+                  | expression DIVIDE expression'''
+    global reductions
+    reductions += 1
+    t[0] = (t[2], t[1], t[3])
+
+def p_expression_group(t):
+    'expression : LPAREN expression RPAREN'
+    t[0] = t[2]
+
+def p_expression_atom(t):
+    '''expression : NUMBER
+                  | NAME'''
+    global reductions
+    reductions += 1
+    t[0] = t[1]
+
+def p_error(t):
+    print("Syntax error at '%s'" % t.value)
+
+parser = yacc.yacc()
+
+data = ''.join('x%d = %d + y * (%d - z)\n' % (n, n, n) for n in range(100))
+result = parser.parse(data, lexer=lexer, checkpoint=10)
+full = reductions
+
+# Change the number on line 91 to 1234
+offset = data.index('x90 = 90') + 6
+reductions = 0
+result = parser.reparse(offset, 2, '1234')
+print(result[90], reductions < full // 5)
+
+# A second parser checks the results against parsing from scratch
+checker = yacc.yacc()
+check = lexer.clone()
+print(result == checker.parse(lexer.lexdata, lexer=check))
+
+# Several edits in a row, including one that adds a line
+edits = [(lexer.lexdata.index('x5 ='), 0, 'a = 1\n'), (0, 2, 'w'), (len(lexer.lexdata) - 3, 1, 'q')]
+for offset, removed, text in edits:
+    result = parser.reparse(offset, removed, text)
+    print(result == checker.parse(lexer.lexdata, lexer=check), len(result))
@@ -0,0 +1,92 @@
+# -----------------------------------------------------------------------------
+# yacc_snapshot.py
+#
+# Saving a parse in progress with snapshot() and resuming it on a new parser
+# -----------------------------------------------------------------------------
+import pickle
+
+import ply.yacc as yacc
+
+from calclex import tokens, lexer
+
+# Parsing rules
+precedence = (
+    ('left','PLUS','MINUS'),
+    ('left','TIMES','DIVIDE'),
+    )
+
+def p_program(t):
+    '''program : program statement
+               | statement'''
+    t[0] = t[1] + [t[2]] if len(t) == 3 else [t[1]]
+
+def p_statement_assign(t):
+    'statement : NAME EQUALS expression'
+    t[0] = (t[1], t[3])
+
+def p_statement_error(t):
+    'statement : error'
+    t[0] = 'error'
+
+def p_expression_binop(t):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression
+                  | expression TIMES expression
+                  | expression DIVIDE expression'''
+    t[0] = (t[2], t[1], t[3])
+
+def p_expression_group(t):
+    'expression : LPAREN expression RPAREN'
+    t[0] = t[2]
+
+def p_expression_atom(t):
+    '''expression : NUMBER
+                  | NAME'''
+    t[0] = t[1]
+
+def p_error(t):
+    print("Syntax error at %r" % t.value)
+
+class Crash(Exception):
+    pass
+
+# A token source that saves the parse and stops after a number of tokens
+class Stopping:
+    def __init__(self, lexer, parser, stop):
+        self.lexer = lexer
+        self.parser = parser
+        self.stop = stop
+        self.saved = None
+
+    def input(self, data):
+        self.lexer.input(data)
+
+    def token(self):
+        self.stop -= 1
+        if not self.stop:
+            self.saved = pickle.dumps(self.parser.snapshot())
+            raise Crash()
+        return self.lexer.token()
+
+    def snapshot(self):
+        return self.lexer.snapshot()
+
+    def restore(self, snap):
+        self.lexer.restore(snap)
+
+data = 'a = 1 + 2\nb = (3 * x\nc = 4\nd = 5 - 6 / y\n'
+parser = yacc.yacc()
+expected = parser.parse(data, lexer=lexer.clone())
+print(expected)
+
+# Stop in the middle of an expression, and while recovering from the error
+for stop in (5, 13, 20):
+    source = Stopping(lexer.clone(), yacc.yacc(), stop)
+    try:
+        source.parser.parse(data, lexer=source)
+    except Crash:
+        pass
+    snap = pickle.loads(source.saved)
+    parser = yacc.yacc()
+    print(stop, snap[3], parser.parse(data, lexer=lexer.clone(), resume=snap) == expected)
+    print(parser.parse(data, lexer=lexer.clone(), resume=snap) == expected)
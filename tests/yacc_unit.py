@@ -0,0 +1,62 @@
+# -----------------------------------------------------------------------------
+# yacc_unit.py
+#
+# A precedence-climbing grammar whose unit productions can be collapsed
+# -----------------------------------------------------------------------------
+import ply.yacc as yacc
+from ply.yacc import positional
+
+from calclex import tokens
+
+operands = []
+
+def p_statement(p):
+    'statement : expression'
+    p[0] = p[1]
+
+def p_expression_plus(p):
+    '''expression : expression PLUS term
+                  | expression MINUS term'''
+    operands.append(p.slice[3].type)
+    p[0] = p[1] + p[3] if p[2] == '+' else p[1] - p[3]
+
+def p_expression_term(p):
+    'expression : term'
+    p[0] = p[1]
+
+def p_term_times(p):
+    '''term : term TIMES factor
+            | term DIVIDE factor'''
+    operands.append(p.slice[3].type)
+    p[0] = p[1] * p[3] if p[2] == '*' else p[1] / p[3]
+
+def p_term_factor(p):
+    'term : factor'
+    p[0] = p[1]
+
+@positional
+def p_factor_primary(value):
+    'factor : primary'
+    return value
+
+def p_factor_minus(p):
+    'factor : MINUS factor'
+    p[0] = -p[2]
+
+def p_primary_number(p):
+    'primary : NUMBER'
+    p[0] = p[1]
+
+def p_primary_group(p):
+    'primary : LPAREN expression RPAREN'
+    p[0] = p[2]
+
+def p_error(t):
+    print("Syntax error at '%s'" % t.value)
+
+import calclex
+data = "2 * (3 + 4) - -1 * 5"
+for collapse in (False, True):
+    del operands[:]
+    parser = yacc.yacc(collapse_units=collapse)
+    print("collapse=%s result=%s operands=%s" % (collapse, parser.parse(data, lexer=calclex.lexer), ','.join(operands)))